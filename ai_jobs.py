@@ -0,0 +1,162 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from db import DB_PATH, get_pool, retry_locked
+
+
+# ---------- AI SUMMARY JOBS ----------
+# LLM summaries run on a small background worker pool instead of inside
+# the button handler. Tokens are appended to the Job as they stream in,
+# so the page can poll and redraw. Identical requests (same model, same
+# prompt) share one in-flight job, and finished summaries are stored in
+# the ai_summaries table keyed by a hash of model + prompt.
+
+AI_MODEL = os.environ.get("TRACKMYCLASS_AI_MODEL", "mistral")
+AI_CLIENT = os.environ.get("TRACKMYCLASS_AI_CLIENT", "ollama")  # "fake" for local testing
+MAX_WORKERS = 2
+MAX_PENDING = 16
+KEEP_FINISHED = 64
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+def summary_key(model, prompt):
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class OllamaClient:
+    def stream(self, model, prompt):
+        import ollama
+
+        for chunk in ollama.chat(model=model, messages=[{"role": "user", "content": prompt}], stream=True):
+            yield chunk["message"]["content"]
+
+
+class FakeClient:
+    """Stands in for the Ollama server: streams a canned reply word by word."""
+
+    def __init__(self, reply=None, delay=0.01, error=None):
+        self.reply = reply
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def stream(self, model, prompt):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        reply = self.reply or f"Summary by {model} of {len(prompt.splitlines())} lines of class data."
+        for word in reply.split(" "):
+            time.sleep(self.delay)
+            yield word + " "
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.error = None
+        self.cached = False
+        self._chunks = []
+        self._done = threading.Event()
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class SummaryJobs:
+    def __init__(self, client=None, path=DB_PATH, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.client = client or (FakeClient() if AI_CLIENT == "fake" else OllamaClient())
+        self.path = path
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai-summary")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        with get_pool(self.path).connection() as conn:
+            row = conn.execute("SELECT summary FROM ai_summaries WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @retry_locked
+    def _store(self, key, model, summary):
+        with get_pool(self.path).connection() as conn:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_summaries (key, model, summary, created_at) VALUES (?, ?, ?, ?)",
+                    (key, model, summary, datetime.now().isoformat(timespec="seconds")),
+                )
+
+    def _run(self, job, model, prompt):
+        try:
+            for token in self.client.stream(model, prompt):
+                job._chunks.append(token)
+            self._store(job.key, model, job.text)
+        except Exception as e:
+            job.error = e
+        finally:
+            job._done.set()
+
+    def _remember(self, job):
+        self._jobs[job.key] = job
+        self._jobs.move_to_end(job.key)
+        finished = [k for k, j in self._jobs.items() if j.done]
+        for k in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self._jobs[k]
+
+    def submit(self, model, prompt):
+        """Return the Job for this request, starting one only if needed."""
+        key = summary_key(model, prompt)
+        with self._lock:
+            job = self._jobs.get(key)
+            # Reuse a running job, or a finished one that succeeded
+            if job is not None and not (job.done and job.error):
+                return job
+
+            summary = self._load(key)
+            if summary is not None:
+                job = Job(key)
+                job._chunks.append(summary)
+                job.cached = True
+                job._done.set()
+                self._remember(job)
+                return job
+
+            if sum(not j.done for j in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull("Too many AI summaries are being generated, please try again shortly.")
+            job = Job(key)
+            self._remember(job)
+        self._executor.submit(self._run, job, model, prompt)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def get_jobs(path=DB_PATH):
+    """The job manager of one database, shared by every session that uses it."""
+    path = os.path.abspath(path)
+    with _jobs_lock:
+        jobs = _jobs.get(path)
+        if jobs is None:
+            jobs = _jobs[path] = SummaryJobs(path=path)
+        return jobs
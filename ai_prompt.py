@@ -0,0 +1,186 @@
+import os
+
+import pandas as pd
+
+from archive import source
+from attendance_stats import class_trend
+
+
+# ---------- AI PROMPT BUILDER ----------
+# Instead of one prompt line per attendance row, the class data is
+# compressed into one line per student (attendance rate, absence streaks,
+# remark/note counts) plus a few recent text excerpts, and cut to a token
+# budget. Prompt size then grows with class size, not with the date range.
+
+TOKEN_BUDGET = int(os.environ.get("TRACKMYCLASS_AI_TOKEN_BUDGET", "3000"))
+CHARS_PER_TOKEN = 4  # rough average for English text with the Mistral tokenizer
+EXCERPTS_PER_STUDENT = 2
+EXCERPT_CHARS = 160
+
+PROMPT_TEMPLATE = """
+You are an assistant helping a teacher.
+Summarize the following class data into a clear report:
+Attendance trends, key remarks, and daily notes.
+Be concise but insightful. Use ONLY the data provided below and do not
+invent extra details; if a section has no data, say "No records available".
+
+Data:
+{data}
+"""
+
+
+def estimate_tokens(text_length):
+    return -(-int(text_length) // CHARS_PER_TOKEN)
+
+
+def load_class_data(conn, class_section, start_date, end_date):
+    params = (class_section, str(start_date), str(end_date))
+    attendance = pd.read_sql(f"""
+        SELECT s.id AS student_id, s.name, s.roll_no, a.date, a.status
+        FROM {source(conn, "attendance", start_date, end_date)} a
+        JOIN students s ON a.student_id = s.id
+        WHERE s.class_section=? AND a.date BETWEEN ? AND ?
+    """, conn, params=params)
+    remarks = pd.read_sql(f"""
+        SELECT s.id AS student_id, s.name, sr.date, sr.remark AS text
+        FROM {source(conn, "student_remarks", start_date, end_date)} sr
+        JOIN students s ON sr.student_id = s.id
+        WHERE s.class_section=? AND sr.date BETWEEN ? AND ?
+    """, conn, params=params)
+    notes = pd.read_sql(f"""
+        SELECT s.id AS student_id, s.name, act.date, act.note AS text
+        FROM {source(conn, "activities", start_date, end_date)} act
+        JOIN students s ON act.student_id = s.id
+        WHERE s.class_section=? AND act.date BETWEEN ? AND ?
+    """, conn, params=params)
+    return attendance, remarks, notes
+
+
+def student_aggregates(attendance, remarks, notes):
+    """One row per student: days, present, rate, absence streaks, remark/note counts."""
+    att = attendance.sort_values(["student_id", "date"]).reset_index(drop=True)
+    absent = att["status"].eq("Absent")
+
+    # Consecutive-absence runs: a new run starts whenever the student or
+    # the absent flag changes from the previous row
+    new_run = att["student_id"].ne(att["student_id"].shift()) | absent.ne(absent.shift())
+    run_length = absent.groupby(new_run.cumsum()).transform("size").where(absent, 0)
+    last_is_absent = absent.groupby(att["student_id"]).last()
+    last_run = run_length.groupby(att["student_id"]).last()
+
+    agg = pd.DataFrame({
+        "name": att.groupby("student_id")["name"].first(),
+        "roll_no": att.groupby("student_id")["roll_no"].first(),
+        "days": att.groupby("student_id").size(),
+        "absent": absent.groupby(att["student_id"]).sum(),
+        "longest_absence": run_length.groupby(att["student_id"]).max(),
+        "current_absence": last_run.where(last_is_absent, 0),
+    })
+    agg["rate"] = ((agg["days"] - agg["absent"]) / agg["days"] * 100).round(1)
+
+    names = pd.concat([agg["name"], remarks.groupby("student_id")["name"].first(),
+                       notes.groupby("student_id")["name"].first()])
+    names = names[~names.index.duplicated()]
+    agg = agg.reindex(names.index)
+    agg["name"] = names
+    agg["remarks"] = remarks.groupby("student_id").size().reindex(agg.index, fill_value=0)
+    agg["notes"] = notes.groupby("student_id").size().reindex(agg.index, fill_value=0)
+
+    # Students needing attention first: lowest attendance, then longest streaks
+    return agg.sort_values(["rate", "longest_absence"], ascending=[True, False], na_position="last")
+
+
+def _student_line(row):
+    if pd.isna(row.rate):
+        line = f"{row.name}: no attendance marked"
+    else:
+        line = f"{row.name}: {row.rate:g}% present ({int(row.days - row.absent)}/{int(row.days)} days)"
+        if row.longest_absence >= 2:
+            line += f", longest absence {int(row.longest_absence)} days"
+        if row.current_absence >= 2:
+            line += f", absent for the last {int(row.current_absence)} days"
+    if row.remarks or row.notes:
+        line += f", {int(row.remarks)} remarks, {int(row.notes)} notes"
+    return line
+
+
+def _excerpts(texts, label):
+    """Latest few entries per student, trimmed."""
+    if texts.empty:
+        return []
+    latest = (texts.sort_values("date", ascending=False)
+                   .groupby("student_id").head(EXCERPTS_PER_STUDENT)
+                   .sort_values(["date", "name"], ascending=[False, True]))
+    text = latest["text"].fillna("").str.strip().str.slice(0, EXCERPT_CHARS)
+    return (f"{label} " + latest["date"] + " " + latest["name"] + ": " + text)[text != ""].tolist()
+
+
+def build_class_context(conn, class_section, start_date, end_date, token_budget=TOKEN_BUDGET):
+    """Return (data_text, stats) for the prompt.
+
+    stats has raw_rows, raw_tokens (what the one-line-per-row format
+    would have cost), tokens, students_listed and truncated.
+    """
+    attendance, remarks, notes = load_class_data(conn, class_section, start_date, end_date)
+
+    # What the old one-line-per-row prompt would have cost, computed without building it
+    raw_chars = 0
+    for df, col in ((attendance, "status"), (remarks, "text"), (notes, "text")):
+        if not df.empty:
+            raw_chars += int((df["date"].str.len() + df["name"].str.len()
+                              + df[col].fillna("").str.len() + 5).sum())
+
+    header = [f"Class {class_section} summary from {start_date} to {end_date}."]
+    if attendance.empty and remarks.empty and notes.empty:
+        header.append("No records available for this period.")
+        text = "\n".join(header)
+        return text, {"raw_rows": 0, "raw_tokens": 0, "tokens": estimate_tokens(len(text)),
+                      "students_listed": 0, "truncated": False}
+
+    agg = student_aggregates(attendance, remarks, notes)
+    trend = class_trend(conn, class_section, start_date, end_date)
+    if trend["marked"].sum() > 0:
+        header.append(f"Class attendance: {trend['present'].sum() / trend['marked'].sum() * 100:.1f}% over "
+                      f"{len(trend)} school days, {len(agg)} students.")
+
+    lines, used, truncated = list(header), sum(len(l) + 1 for l in header), False
+    budget_chars = token_budget * CHARS_PER_TOKEN
+
+    def add(line):
+        nonlocal used
+        if used + len(line) + 1 > budget_chars:
+            return False
+        lines.append(line)
+        used += len(line) + 1
+        return True
+
+    add("\nPer student (lowest attendance first):")
+    listed = 0
+    for row in agg.itertuples():
+        if not add(_student_line(row)):
+            truncated = True
+            break
+        listed += 1
+    if listed < len(agg):
+        lines.append(f"...and {len(agg) - listed} more students with higher attendance.")
+
+    for title, entries in (("\nRecent remarks:", _excerpts(remarks, "Remark")),
+                           ("\nRecent activities/notes:", _excerpts(notes, "Note"))):
+        if entries and not truncated and add(title):
+            for entry in entries:
+                if not add(entry):
+                    truncated = True
+                    break
+
+    text = "\n".join(lines)
+    return text, {
+        "raw_rows": len(attendance) + len(remarks) + len(notes),
+        "raw_tokens": estimate_tokens(raw_chars),
+        "tokens": estimate_tokens(len(text)),
+        "students_listed": listed,
+        "truncated": truncated,
+    }
+
+
+def build_prompt(data_text):
+    return PROMPT_TEMPLATE.format(data=data_text)
@@ -0,0 +1,374 @@
+"""Academic-year archives: closed years of attendance, remarks and notes in their own files.
+
+    python archive.py list [--db students.db]
+    python archive.py archive --until 2023-24 [--db students.db] [--vacuum]
+    python archive.py prune [--db students.db]
+
+An academic year runs from the first of YEAR_START_MONTH to the day before
+it a year later and is named like 2024-25. `archive` moves every closed
+year up to --until, oldest first, from attendance, student_remarks and
+activities into archive/<db>-<year>.db next to the database, and records
+it in the archives table. The hot database then only grows with the
+years still open.
+
+What stays hot: the roster, and the attendance rollups and bitmaps, so
+overview statistics, charts by month and early warnings keep working
+over any range without opening an archive. Archived notes and remarks
+leave the search index. Archived dates are read-only (migration v10),
+and class totals of archived days stay with the class the student was
+in when the year was archived (recorded in the archive's
+student_classes table).
+
+Readers that need raw rows by date build their FROM clause with
+source(conn, table, start, end). While the range is all in the hot
+database that is just the table; otherwise the archives it overlaps are
+ATTACHed to that connection and read through a UNION ALL, so old years
+are only opened by queries that ask for them.
+
+A year is moved in three steps, each safe to interrupt: it is first
+registered without archived_at, which makes its dates read-only; its
+rows are then copied and committed to the archive file; finally they are
+deleted from the hot database and archived_at is set, in one
+transaction. Running `archive` again finishes a year left half done.
+`prune` drops archived rows of students deleted since.
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+from cache import bump
+
+
+YEAR_START_MONTH = int(os.environ.get("TRACKMYCLASS_YEAR_START_MONTH", "6"))
+ARCHIVE_DIR = os.environ.get("TRACKMYCLASS_ARCHIVE_DIR", "archive")  # relative to the database's folder
+MAX_ATTACHED = 8  # SQLite allows 10 attached databases per connection by default
+
+# table -> (archive schema, columns copied)
+TABLES = {
+    "attendance": ("id INTEGER PRIMARY KEY, student_id INTEGER, date TEXT, status TEXT, UNIQUE (student_id, date)",
+                   "id, student_id, date, status"),
+    "student_remarks": ("id INTEGER PRIMARY KEY, student_id INTEGER, date TEXT, remark TEXT, UNIQUE (student_id, date)",
+                        "id, student_id, date, remark"),
+    "activities": ("id INTEGER PRIMARY KEY, student_id INTEGER, date TEXT, note TEXT",
+                   "id, student_id, date, note"),
+}
+INDEXES = [
+    "CREATE INDEX {schema}.ix_activities_student_date ON activities(student_id, date)",
+    "CREATE INDEX {schema}.ix_attendance_date ON attendance(date)",
+]
+# Each student's class when the year was archived: the hot class_daily
+# keeps their archived days under it, whatever class they move to later
+STUDENT_CLASSES = "student_id INTEGER PRIMARY KEY, class_section TEXT"
+
+
+def academic_year(day):
+    """Name of the academic year `day` falls in, e.g. '2024-25'."""
+    day = date.fromisoformat(str(day)[:10])
+    first = day.year if day.month >= YEAR_START_MONTH else day.year - 1
+    return str(first) if YEAR_START_MONTH == 1 else f"{first}-{(first + 1) % 100:02d}"
+
+
+def year_range(year):
+    """(first day, last day) of an academic year name, as ISO strings."""
+    first = int(str(year)[:4])
+    start = date(first, YEAR_START_MONTH, 1)
+    end = date(first + 1, YEAR_START_MONTH, 1) - timedelta(days=1)
+    return str(start), str(end)
+
+
+def _schema(year):
+    return "y" + year.replace("-", "_")
+
+
+def _db_file(conn):
+    return next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == "main")
+
+
+def _archive_path(conn, relative):
+    return os.path.join(os.path.dirname(os.path.abspath(_db_file(conn))), relative)
+
+
+def archived_years(conn):
+    """(year, start_date, end_date, path) of every completed archive, oldest first.
+
+    Not cached: an archive run in another process must be seen by the
+    next query here, or the archived term would vanish from every reader
+    until a cache expired. The table has one row per year.
+    """
+    return conn.execute("""SELECT year, start_date, end_date, path FROM archives
+                           WHERE archived_at IS NOT NULL ORDER BY start_date""").fetchall()
+
+
+def archived_until(conn):
+    """Last archived (read-only) date, or None."""
+    return conn.execute("SELECT MAX(end_date) FROM archives").fetchone()[0]
+
+
+def _attach(conn, years):
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    wanted = {_schema(year): path for year, _, _, path in years}
+    if len(wanted) > MAX_ATTACHED:
+        raise ValueError(f"The date range covers {len(wanted)} archived years; "
+                         f"at most {MAX_ATTACHED} can be read at once.")
+    stale = [name for name in attached if name.startswith("y") and name not in wanted]
+    if len(attached & set(wanted)) + len(stale) + len(wanted.keys() - attached) > MAX_ATTACHED:
+        for name in stale:
+            conn.execute(f"DETACH DATABASE {name}")
+    for name, relative in wanted.items():
+        if name not in attached:
+            path = _archive_path(conn, relative)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Archive {relative} is missing (expected at {path}).")
+            conn.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+    return list(wanted)
+
+
+def source(conn, table, start_date=None, end_date=None):
+    """FROM-clause source for `table` over [start_date, end_date] (None leaves a side open).
+
+    The table itself while the range is all hot; otherwise a UNION ALL
+    with the archives the range overlaps, attached to `conn` on demand.
+    """
+    start = str(start_date) if start_date is not None else None
+    end = str(end_date) if end_date is not None else None
+    years = [row for row in archived_years(conn)
+             if (start is None or row[2] >= start) and (end is None or row[1] <= end)]
+    if not years:
+        return table
+    columns = TABLES[table][1]
+    parts = [f"SELECT {columns} FROM main.{table}"]
+    parts += [f"SELECT {columns} FROM {schema}.{table}" for schema in _attach(conn, years)]
+    return "(" + " UNION ALL ".join(parts) + ")"
+
+
+# ---------- ARCHIVING ----------
+
+def _hot_rows(c, table, start, end):
+    return c.execute(f"SELECT COUNT(*) FROM main.{table} WHERE date BETWEEN ? AND ?", (start, end)).fetchone()[0]
+
+
+def _copy_year(conn, year, start, end, path):
+    """Write the year's rows to a fresh archive file and commit them there."""
+    for leftover in (path, path + "-journal"):
+        if os.path.exists(leftover):  # from an interrupted run; never registered as complete
+            os.remove(leftover)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS archiving", (path,))
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for table, (ddl, columns) in TABLES.items():
+                c.execute(f"CREATE TABLE archiving.{table} ({ddl})")
+                c.execute(f"INSERT INTO archiving.{table} ({columns}) SELECT {columns} FROM main.{table} "
+                          f"WHERE date BETWEEN ? AND ? ORDER BY id", (start, end))
+            c.execute(f"CREATE TABLE archiving.student_classes ({STUDENT_CLASSES})")
+            c.execute("""INSERT INTO archiving.student_classes (student_id, class_section)
+                         SELECT id, COALESCE(class_section, '') FROM main.students
+                         WHERE id IN (SELECT student_id FROM archiving.attendance)""")
+            for index in INDEXES:
+                c.execute(index.format(schema="archiving"))
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        return {table: conn.execute(f"SELECT COUNT(*) FROM archiving.{table}").fetchone()[0] for table in TABLES}
+    finally:
+        conn.execute("DETACH DATABASE archiving")
+
+
+def _drop_from_hot(conn, year, start, end, copied):
+    """Delete the archived rows from the hot database and mark the year complete."""
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        for table, rows in copied.items():
+            if _hot_rows(c, table, start, end) != rows:
+                raise RuntimeError(f"{table} for {year} changed while it was being archived; run archive again.")
+        # The rollups and bitmaps keep the archived months, so the per-row
+        # triggers must not run; the search index is cleaned in bulk
+        triggers = c.execute(f"""SELECT name, sql FROM sqlite_master WHERE type = 'trigger'
+                                 AND tbl_name IN ({", ".join("?" * len(TABLES))})""", list(TABLES)).fetchall()
+        for name, _ in triggers:
+            c.execute(f"DROP TRIGGER {name}")
+        c.execute("DELETE FROM notes_fts WHERE rowid IN (SELECT id * 2 FROM activities WHERE date BETWEEN ? AND ?)", (start, end))
+        c.execute("DELETE FROM notes_fts WHERE rowid IN (SELECT id * 2 + 1 FROM student_remarks WHERE date BETWEEN ? AND ?)", (start, end))
+        for table in TABLES:
+            c.execute(f"DELETE FROM main.{table} WHERE date BETWEEN ? AND ?", (start, end))
+        for _, sql in triggers:
+            c.execute(sql)
+        c.execute("""UPDATE archives SET attendance_rows = ?, remark_rows = ?, note_rows = ?, archived_at = ?
+                     WHERE year = ?""",
+                  (copied["attendance"], copied["student_remarks"], copied["activities"],
+                   datetime.now().isoformat(timespec="seconds"), year))
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def archive(conn, until, today=None, log=print):
+    """Archive every closed academic year up to and including `until`, oldest first."""
+    today = today or date.today()
+    if year_range(until)[1] >= str(today):
+        raise ValueError(f"{until} has not ended yet; only closed academic years can be archived.")
+    first = conn.execute("""SELECT MIN(d) FROM (SELECT MIN(date) AS d FROM attendance
+                            UNION ALL SELECT MIN(date) FROM student_remarks
+                            UNION ALL SELECT MIN(date) FROM activities)""").fetchone()[0]
+    registered = dict(conn.execute("SELECT year, archived_at FROM archives").fetchall())
+
+    years = []
+    if first is not None:
+        year = academic_year(first)
+        while year_range(year)[0] <= year_range(until)[0]:
+            years.append(year)
+            year = academic_year(date.fromisoformat(year_range(year)[1]) + timedelta(days=1))
+    years += [year for year, done in registered.items() if done is None and year not in years]
+
+    stem = os.path.splitext(os.path.basename(_db_file(conn)))[0]
+    archived = []
+    for year in sorted(years):
+        if registered.get(year) is not None:
+            continue
+        start, end = year_range(year)
+        relative = os.path.join(ARCHIVE_DIR, f"{stem}-{year}.db")
+        with conn:
+            # From here on the year's dates are read-only
+            conn.execute("""INSERT INTO archives (year, start_date, end_date, path) VALUES (?, ?, ?, ?)
+                            ON CONFLICT (year) DO NOTHING""", (year, start, end, relative))
+        copied = _copy_year(conn, year, start, end, _archive_path(conn, relative))
+        _drop_from_hot(conn, year, start, end, copied)
+        bump("attendance", "student_remarks", "activities", conn=conn)
+        log(f"{year}: {copied['attendance']:,} attendance, {copied['student_remarks']:,} remarks, "
+            f"{copied['activities']:,} notes -> {relative}")
+        archived.append(year)
+    return archived
+
+
+def purge_students(conn, student_ids, then=None):
+    """Delete the archived rows of students, and run `then(c)` in the same transaction.
+
+    `then` is the delete of the students themselves: start while they
+    still exist, since the archives are read to take their archived days
+    out of class_daily. Their hot rows go with the students table's
+    cascade. The newest MAX_ATTACHED archives are purged in that one
+    transaction; any older ones go first, a transaction each. Purging
+    is idempotent, so if it stops before the last transaction the delete
+    only needs repeating. SQLite commits attached WAL databases one after
+    another, main first, so a crash during that commit can still leave
+    archived rows of students already deleted; `prune` removes them.
+    """
+    ids = [int(sid) for sid in student_ids]
+    if not ids:
+        return 0
+    return _purge(conn, f"IN ({', '.join('?' * len(ids))})", ids, then=then)
+
+
+def prune(conn):
+    """Delete archived rows of students who are no longer in the hot database.
+
+    class_daily is left alone: a student deleted through purge_students
+    has already been taken out of it.
+    """
+    return _purge(conn, "NOT IN (SELECT id FROM main.students)", [], class_daily=False)
+
+
+def _has_classes(conn, schema):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'student_classes'").fetchone() is not None
+
+
+def _purge_year(c, year, schema, recorded, students, params, class_daily):
+    first, last = year[1], year[2]
+    # `k.class_section` is the class an archived row's days are counted under
+    classes = (f"JOIN {schema}.student_classes k ON k.student_id = a.student_id" if recorded else
+               # Archived before classes were recorded: the current class is the best guess
+               "JOIN (SELECT id AS student_id, COALESCE(class_section, '') AS class_section FROM main.students) k "
+               "USING (student_id)")
+    # The hot rollups keep archived months; take these students out of them
+    if class_daily:
+        c.execute(f"""
+            UPDATE class_daily
+               SET students_marked = students_marked - (
+                       SELECT COUNT(*) FROM {schema}.attendance a {classes}
+                       WHERE a.student_id {students} AND a.date = class_daily.date
+                         AND k.class_section = class_daily.class_section),
+                   present = present - (
+                       SELECT COUNT(*) FROM {schema}.attendance a {classes}
+                       WHERE a.student_id {students} AND a.date = class_daily.date AND a.status = 'Present'
+                         AND k.class_section = class_daily.class_section)
+             WHERE date BETWEEN ? AND ?
+        """, params * 2 + [first, last])
+        c.execute("DELETE FROM class_daily WHERE students_marked <= 0")
+    for table in ("attendance_monthly", "attendance_bitmaps"):
+        c.execute(f"DELETE FROM {table} WHERE student_id {students} AND month BETWEEN ? AND ?",
+                  params + [first[:7], last[:7]])
+    removed = 0
+    for table in TABLES:
+        removed += c.execute(f"DELETE FROM {schema}.{table} WHERE student_id {students}", params).rowcount
+    if recorded:
+        c.execute(f"DELETE FROM {schema}.student_classes WHERE student_id {students}", params)
+    return removed
+
+
+def _purge(conn, students, params, class_daily=True, then=None):
+    years = archived_years(conn)
+    # A connection attaches at most MAX_ATTACHED archives, so older ones get a transaction each
+    batches = [[year] for year in years[:-MAX_ATTACHED]] + [years[-MAX_ATTACHED:]]
+    removed = 0
+    for i, batch in enumerate(batches):
+        schemas = _attach(conn, batch) if batch else []
+        recorded = [_has_classes(conn, schema) for schema in schemas]
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for year, schema, has_classes in zip(batch, schemas, recorded):
+                removed += _purge_year(c, year, schema, has_classes, students, params, class_daily)
+            if then is not None and i == len(batches) - 1:
+                then(c)
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+    if removed:
+        bump("attendance", "student_remarks", "activities", conn=conn)
+    return removed
+
+
+def main(argv=None):
+    from db import DB_PATH, get_pool
+
+    parser = argparse.ArgumentParser(description="Move closed academic years out of the hot database.")
+    parser.add_argument("command", choices=["list", "archive", "prune"])
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--until", help="last academic year to archive, e.g. 2023-24")
+    parser.add_argument("--vacuum", action="store_true", help="compact the hot database afterwards")
+    args = parser.parse_args(argv)
+    if args.command == "archive" and not args.until:
+        parser.error("archive needs --until")
+
+    with get_pool(args.db).connection() as conn:
+        if args.command == "archive":
+            try:
+                archived = archive(conn, args.until)
+            except ValueError as e:
+                print(e)
+                return 1
+            if not archived:
+                print("Nothing to archive.")
+            if args.vacuum:
+                conn.execute("VACUUM")
+        elif args.command == "prune":
+            print(f"Removed {prune(conn):,} archived rows of deleted students.")
+            return 0
+
+        print(f"{'hot database':>14}: {os.path.getsize(args.db) / 1024:,.0f} KiB")
+        for year, start, end, relative in archived_years(conn):
+            path = _archive_path(conn, relative)
+            size = f"{os.path.getsize(path) / 1024:,.0f} KiB" if os.path.exists(path) else "MISSING"
+            print(f"{year:>14}: {start} to {end}, {relative}, {size}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import pandas as pd
+
+from archive import source
+from cache import bump, cached
+from db import retry_locked
+
+
+# ---------- ATTENDANCE GRID ----------
+# The "Mark Attendance" page edits a student x date grid of checkboxes
+# (ticked = Present). The grid is loaded with one query, and saving
+# writes only the cells that differ from what is stored, as one
+# executemany upsert in one transaction.
+
+PRESENT, ABSENT = "Present", "Absent"
+
+UPSERT_SQL = """
+    INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)
+    ON CONFLICT(student_id, date) DO UPDATE SET status=excluded.status
+"""
+
+
+def date_columns(start_date, end_date):
+    return [str(d.date()) for d in pd.date_range(start_date, end_date)]
+
+
+@cached("students", "attendance")
+def load_attendance_grid(conn, class_section, dates):
+    """Return (grid, recorded) for a class over `dates`.
+
+    `grid` has student_id, Name, Roll No and one bool column per date,
+    defaulting to Present where nothing is stored yet. `recorded` is a
+    bool frame of the same shape telling which cells exist in the table.
+    """
+    rows = pd.read_sql(
+        f"""
+        SELECT s.id AS student_id, s.name AS "Name", s.roll_no AS "Roll No", a.date, a.status
+        FROM students s
+        LEFT JOIN {source(conn, "attendance", dates[0], dates[-1])} a ON a.student_id = s.id AND a.date BETWEEN ? AND ?
+        WHERE s.class_section = ?
+        ORDER BY s.id
+        """,
+        conn, params=(dates[0], dates[-1], class_section),
+    )
+    roster = rows[["student_id", "Name", "Roll No"]].drop_duplicates("student_id").set_index("student_id")
+
+    marked = rows.dropna(subset=["date"])
+    status = marked.pivot(index="student_id", columns="date", values="status")
+    status = status.reindex(index=roster.index, columns=dates)
+
+    recorded = status.notna()
+    present = status.ne(ABSENT)  # unrecorded cells default to Present
+    grid = roster.join(present).reset_index()
+    return grid, recorded
+
+
+def changed_cells(grid, edited, recorded, dates):
+    """List (student_id, date, status) for cells that need writing."""
+    before = grid.set_index("student_id")[dates]
+    after = edited.set_index("student_id")[dates].astype(bool)
+    unrecorded = ~recorded.reindex(index=after.index, columns=dates, fill_value=False)
+    dirty = (after.ne(before) | unrecorded).stack()
+
+    cells = after.stack()[dirty]
+    return [
+        (int(sid), d, PRESENT if is_present else ABSENT)
+        for (sid, d), is_present in cells.items()
+    ]
+
+
+@retry_locked
+def save_attendance(conn, changes):
+    """Upsert (student_id, date, status) rows in a single transaction."""
+    if not changes:
+        return 0
+    with conn:
+        conn.executemany(UPSERT_SQL, changes)
+    bump("attendance", conn=conn)
+    return len(changes)
+
+
+@cached("attendance")
+def student_attendance(conn, sid, start_date=None, end_date=None):
+    query, params = f"SELECT date, status FROM {source(conn, 'attendance', start_date, end_date)} WHERE student_id=?", [int(sid)]
+    if start_date is not None:
+        query += " AND date >= ?"
+        params.append(str(start_date))
+    if end_date is not None:
+        query += " AND date <= ?"
+        params.append(str(end_date))
+    return pd.read_sql(query + " ORDER BY date", conn, params=params)
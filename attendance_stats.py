@@ -0,0 +1,145 @@
+import pandas as pd
+
+from archive import source
+from cache import cached
+
+
+# ---------- ATTENDANCE AGGREGATION ----------
+# One GROUP BY per call, for one class or the whole school. Dates are
+# optional; passing None leaves that side of the range open.
+#
+# Whole months are read from the attendance_monthly rollup; only the days
+# of a partially covered first/last month touch raw attendance rows, so
+# the cost depends on the number of students, not on years of history.
+
+LOW_ATTENDANCE_THRESHOLD = 75
+
+
+def _split_range(start_date, end_date):
+    """Split [start, end] into whole months plus raw-day edges.
+
+    Returns (first_month, last_month, edges) where months are 'YYYY-MM'
+    strings (None when no whole month is covered) and edges is a list of
+    (from, to) inclusive date ranges, None meaning open.
+    """
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+
+    if start is None:
+        first_month, left = "0000-00", None
+    elif start.day == 1:
+        first_month, left = start.strftime("%Y-%m"), None
+    else:
+        next_month = start + pd.offsets.MonthBegin(1)
+        first_month, left = next_month.strftime("%Y-%m"), (start, next_month - pd.Timedelta(days=1))
+
+    if end is None:
+        last_month, right = "9999-99", None
+    elif end.is_month_end:
+        last_month, right = end.strftime("%Y-%m"), None
+    else:
+        month_start = end - pd.offsets.MonthBegin(1) if end.day != 1 else end
+        last_month, right = (month_start - pd.Timedelta(days=1)).strftime("%Y-%m"), (month_start, end)
+
+    if first_month > last_month:
+        # No whole month inside the range: count the raw days only
+        return None, None, [(start, end)]
+    return first_month, last_month, [edge for edge in (left, right) if edge is not None]
+
+
+def _day(value):
+    return None if value is None else str(value.date())
+
+
+@cached("students", "attendance")
+def attendance_summary(conn, class_section=None, start_date=None, end_date=None):
+    """Per-student total days, present days and attendance % as a DataFrame."""
+    first_month, last_month, edges = _split_range(start_date, end_date)
+
+    # Restrict each part to the class up front so SQLite can use the
+    # (student_id, ...) indexes instead of scanning whole date ranges
+    in_class, class_params = "", []
+    if class_section is not None:
+        in_class = " AND student_id IN (SELECT id FROM students WHERE class_section = ?)"
+        class_params = [str(class_section).strip()]
+
+    parts, params = [], []
+    if first_month is not None:
+        parts.append(f"SELECT student_id, days, present FROM attendance_monthly WHERE month BETWEEN ? AND ?{in_class}")
+        params += [first_month, last_month] + class_params
+    for edge_start, edge_end in edges:
+        clauses = ["1"]
+        if edge_start is not None:
+            clauses.append("date >= ?")
+            params.append(_day(edge_start))
+        if edge_end is not None:
+            clauses.append("date <= ?")
+            params.append(_day(edge_end))
+        table = source(conn, "attendance", _day(edge_start), _day(edge_end))
+        parts.append(f"SELECT student_id, 1, status = 'Present' FROM {table} WHERE {' AND '.join(clauses)}{in_class}")
+        params += class_params
+
+    query = f"""
+        WITH counts (student_id, days, present) AS ({" UNION ALL ".join(parts)}),
+             totals AS (SELECT student_id, SUM(days) AS days, SUM(present) AS present
+                        FROM counts GROUP BY student_id)
+        SELECT s.id AS student_id,
+               s.name AS "Name",
+               s.roll_no AS "Roll No",
+               s.class_section AS "Class/Section",
+               COALESCE(t.days, 0) AS "Total Days",
+               COALESCE(t.present, 0) AS "Present"
+        FROM students s
+        LEFT JOIN totals t ON t.student_id = s.id
+    """
+    if class_section is not None:
+        query += " WHERE s.class_section = ?"
+        params.append(str(class_section).strip())
+    query += " ORDER BY s.class_section, s.roll_no, s.name"
+
+    df = pd.read_sql(query, conn, params=params)
+    return add_percentage(df)
+
+
+@cached("students", "attendance")
+def class_trend(conn, class_section=None, start_date=None, end_date=None):
+    """Day-by-day students marked, present and attendance % from the class_daily rollup."""
+    query = "SELECT date, SUM(students_marked) AS marked, SUM(present) AS present FROM class_daily WHERE 1"
+    params = []
+    if class_section is not None:
+        query += " AND class_section = ?"
+        params.append(str(class_section).strip())
+    if start_date is not None:
+        query += " AND date >= ?"
+        params.append(str(start_date))
+    if end_date is not None:
+        query += " AND date <= ?"
+        params.append(str(end_date))
+    query += " GROUP BY date ORDER BY date"
+
+    df = pd.read_sql(query, conn, params=params)
+    df["Attendance %"] = (df["present"] / df["marked"].where(df["marked"] > 0) * 100).round(2).fillna(0)
+    return df
+
+
+def add_percentage(df):
+    total = df["Total Days"]
+    pct = (df["Present"] / total.where(total > 0) * 100).round(2)
+    df["Attendance %"] = pct.fillna(0)
+    return df
+
+
+def below_threshold(df, threshold=LOW_ATTENDANCE_THRESHOLD):
+    return df[df["Attendance %"] < threshold]
+
+
+def class_summary(df):
+    """Roll a student-level summary up to one row per class."""
+    grouped = df.groupby("Class/Section", as_index=False).agg(
+        **{
+            "Students": ("student_id", "count"),
+            "Total Days": ("Total Days", "sum"),
+            "Present": ("Present", "sum"),
+        }
+    )
+    return add_percentage(grouped)
@@ -0,0 +1,5 @@
+"""Synthetic students.db fixtures and timings for each page's data path.
+
+    python -m bench.fixtures --out bench.db --preset full
+    python -m bench.run --db bench.db --out results.json --compare baseline.json
+"""
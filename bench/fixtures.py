@@ -0,0 +1,149 @@
+"""Build a realistic students.db at a chosen scale.
+
+    python -m bench.fixtures --out bench.db --preset full
+    python -m bench.fixtures --out bench.db --classes 10 --students 2000 --years 1
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+import bitmaps
+import rollups
+import search
+from migrations import migrate
+
+
+PRESETS = {
+    "small": {"classes": 5, "students": 500, "years": 1},
+    "medium": {"classes": 20, "students": 5000, "years": 1},
+    "full": {"classes": 50, "students": 20000, "years": 3},
+}
+
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Ananya", "Kabir", "Meera", "Rohan", "Saanvi",
+               "Vihaan", "Aditi", "Arjun", "Kavya", "Reyansh", "Myra", "Ayaan", "Pari"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Singh", "Kumar", "Patel", "Reddy", "Nair",
+              "Iyer", "Das", "Mehta", "Joshi", "Khan", "Bose", "Rao", "Malhotra"]
+REMARKS = ["Did not submit homework", "Excellent participation", "Talks during class",
+           "Improved handwriting", "Needs help with fractions", "Late to class",
+           "Helped a classmate", "Forgot textbook", "Great project work", "Distracted today"]
+NOTES = ["Sports practice", "Library duty", "Science fair preparation", "Music class",
+         "Art competition", "Class monitor duty", "Debate club", "Field trip"]
+
+BATCH = 50000
+
+
+def school_days(years, end=None):
+    """Weekdays going back `years` academic years from `end` (default today)."""
+    end = end or date.today()
+    day = end - timedelta(days=365 * years)
+    days = []
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(str(day))
+        day += timedelta(days=1)
+    return days
+
+
+def class_names(count):
+    sections = "ABCDE"
+    return [f"{1 + i // len(sections)}{sections[i % len(sections)]}" for i in range(count)]
+
+
+def _insert_batches(c, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            c.executemany(sql, batch)
+            batch = []
+    if batch:
+        c.executemany(sql, batch)
+
+
+def generate(path, classes=50, students=20000, years=3, remark_rate=0.03, note_rate=0.01, seed=7, progress=print):
+    """Write a fixture database to `path` (replacing it) and return its row counts."""
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+
+    # Per-row rollup, search-index and bitmap triggers would dominate a
+    # bulk load: drop them, load, fill the derived tables in one pass and
+    # put the triggers back
+    triggers = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'").fetchall()
+    conn.execute("PRAGMA synchronous=OFF")
+    c = conn.cursor()
+    c.execute("BEGIN")
+    for name, _ in triggers:
+        c.execute(f"DROP TRIGGER {name}")
+
+    names = class_names(classes)
+    per_class = max(1, students // classes)
+    roster = []
+    for cls in names:
+        for roll in range(1, per_class + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            roster.append((f"{first} {last}", str(roll), cls, f"{rng.choice(FIRST_NAMES)} {last}",
+                           f"98{rng.randrange(10**8):08d}", ""))
+    c.executemany("INSERT INTO students (name, roll_no, class_section, father_name, contact, photo) VALUES (?, ?, ?, ?, ?, ?)", roster)
+    ids = [row[0] for row in c.execute("SELECT id FROM students ORDER BY id")]
+    progress(f"{len(ids)} students in {classes} classes")
+
+    days = school_days(years)
+    # Each student has their own typical attendance, a few are chronic absentees
+    rates = {sid: min(0.99, max(0.4, rng.gauss(0.9, 0.07))) for sid in ids}
+    t0 = time.perf_counter()
+    _insert_batches(
+        c, "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+        ((sid, d, "Present" if rng.random() < rates[sid] else "Absent") for sid in ids for d in days),
+    )
+    progress(f"{len(ids) * len(days)} attendance rows over {len(days)} school days ({time.perf_counter() - t0:.1f}s)")
+
+    _insert_batches(
+        c, "INSERT OR IGNORE INTO student_remarks (student_id, date, remark) VALUES (?, ?, ?)",
+        ((sid, d, rng.choice(REMARKS)) for sid in ids for d in days if rng.random() < remark_rate),
+    )
+    _insert_batches(
+        c, "INSERT INTO activities (student_id, date, note) VALUES (?, ?, ?)",
+        ((sid, d, rng.choice(NOTES)) for sid in ids for d in days if rng.random() < note_rate),
+    )
+
+    rollups.fill(c)
+    search.fill(c)
+    bitmaps.fill(c)
+    for _, sql in triggers:
+        c.execute(sql)
+    # The bitmap benchmarks read stored masks, so fixtures have them turned on
+    bitmaps.create_triggers(c)
+    c.execute("COMMIT")
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("students", "attendance", "student_remarks", "activities")}
+    conn.close()
+    progress(f"done: {counts}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic students.db for benchmarks.")
+    parser.add_argument("--out", default="bench.db")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--classes", type=int)
+    parser.add_argument("--students", type=int)
+    parser.add_argument("--years", type=int)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    scale = dict(PRESETS[args.preset])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+    generate(args.out, seed=args.seed, **scale)
+
+
+if __name__ == "__main__":
+    main()
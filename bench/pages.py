@@ -0,0 +1,100 @@
+"""Cold-start and warm-rerun time of every page, through Streamlit's AppTest.
+
+    python -m bench.pages --db bench.db
+    python -m bench.pages --db bench.db --only "Reports" --out pages.json
+
+Each page is measured in a fresh Python process: the cold time is the
+first script run (imports, pool creation, migration check, first queries),
+the warm time is the median of the reruns that follow, with caches warm.
+Pages over their target are flagged and make the command exit with 1.
+The same fixture caveat as bench.run applies: point --db at a generated
+fixture, never at a real students.db.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from views import PAGES
+
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "teacherapp.py")
+
+# Milliseconds; generous enough for a laptop with the "medium" fixture
+COLD_TARGET_MS = 2500
+WARM_TARGET_MS = 300
+TARGETS = {label: {"cold_ms": COLD_TARGET_MS, "warm_ms": WARM_TARGET_MS} for label in PAGES}
+
+# Modules worth knowing about when a cold start is slow
+HEAVY_MODULES = ["matplotlib", "ollama", "openpyxl", "PIL"]
+
+
+def measure(label, reruns):
+    """Runs in the child process: time one page, print the result as JSON."""
+    from streamlit.testing.v1 import AppTest  # the server has streamlit loaded before any session
+
+    t0 = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.session_state["page"] = label
+    at.run()
+    cold = (time.perf_counter() - t0) * 1000
+    if at.exception:
+        raise RuntimeError(f"{label}: {at.exception[0].value}")
+
+    warm = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        warm.append((time.perf_counter() - t0) * 1000)
+    print(json.dumps({
+        "cold_ms": round(cold, 1),
+        "warm_ms": round(statistics.median(warm), 1),
+        "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+
+def run(db_path, reruns=5, only=None):
+    env = dict(os.environ, TRACKMYCLASS_DB=os.path.abspath(db_path), TRACKMYCLASS_AI_CLIENT="fake")
+    results = {}
+    for label in PAGES:
+        if only and label not in only:
+            continue
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.pages", "--child", label, "--reruns", str(reruns)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        over = [k for k, target in TARGETS[label].items() if res[k] > target]
+        res["over_target"] = over
+        results[label] = res
+        print(f"{label:>26}: cold {res['cold_ms']:8.1f} ms, warm {res['warm_ms']:7.1f} ms"
+              f"{'  <-- OVER TARGET (' + ', '.join(over) + ')' if over else ''}"
+              f"  [{', '.join(res['heavy_modules']) or 'no heavy imports'}]")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cold start and warm reruns of each page.")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--only", nargs="*", choices=list(PAGES))
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure(args.child, args.reruns)
+        return 0
+
+    results = run(args.db, args.reruns, args.only)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"targets": TARGETS, "results": results}, f, indent=2)
+    return 1 if any(r["over_target"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Time the data path behind each menu entry, without a browser.
+
+    python -m bench.run --db bench.db --out results.json
+    python -m bench.run --db bench.db --compare results.json
+
+Benchmarks write to the fixture database (attendance for a future day,
+remarks, imported students), so point --db at a generated fixture and
+never at a real students.db. Caches are cleared before every repeat so
+the numbers are for the database work, not for cache hits.
+"""
+import argparse
+import io
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from ai_prompt import build_class_context, build_prompt, student_aggregates
+from attendance import changed_cells, date_columns, load_attendance_grid, save_attendance
+from attendance_stats import attendance_summary, below_threshold
+from bitmaps import AttendanceMatrix, student_rates
+from cache import clear_all
+from db import connect
+from importer import import_students
+from migrations import migrate
+from profiler import profile
+from remarks import changed_remarks, load_remarks_grid, save_remarks
+from search import search_notes, search_students
+from students import class_list, roster_page, roster_slice
+
+
+REGRESSION_THRESHOLD = 0.20  # flag anything 20% slower than the baseline median...
+MIN_DELTA_MS = 2.0  # ...and at least this much slower, so timer noise on fast paths is ignored
+
+
+def _pick_class(conn):
+    classes = class_list(conn)
+    return classes[len(classes) // 2]
+
+
+def bench_mark_attendance_save(conn, ctx):
+    # A day after anything stored so every repeat, in this run or a later
+    # one against the same fixture, is a fresh save of the whole class
+    if "att_day" not in ctx:
+        last = conn.execute("SELECT MAX(date) FROM attendance").fetchone()[0]
+        ctx["att_day"] = max(date.fromisoformat(last) if last else date.today(), date.today() + timedelta(days=3650))
+    ctx["att_day"] += timedelta(days=1)
+    dates = date_columns(ctx["att_day"], ctx["att_day"])
+    grid, recorded = load_attendance_grid(conn, ctx["class"], dates)
+    edited = grid.copy()
+    edited.loc[edited.index[::7], dates[0]] = False
+    return save_attendance(conn, changed_cells(grid, edited, recorded, dates))
+
+
+def bench_class_overview(conn, ctx):
+    df = attendance_summary(conn, ctx["class"], None, None)
+    return len(below_threshold(df))
+
+
+def bench_school_overview_term(conn, ctx):
+    end = date.today()
+    return len(attendance_summary(conn, None, end - timedelta(days=120), end))
+
+
+def bench_remarks_load(conn, ctx):
+    end = date.today()
+    dates = date_columns(end - timedelta(days=30), end)
+    return len(load_remarks_grid(conn, ctx["class"], dates))
+
+
+def bench_remarks_save(conn, ctx):
+    end = date.today()
+    dates = date_columns(end - timedelta(days=6), end)
+    grid = load_remarks_grid(conn, ctx["class"], dates)
+    edited = grid.copy()
+    edited[dates[-1]] = edited[dates[-1]] + "."
+    return save_remarks(conn, *changed_remarks(grid, edited, dates))
+
+
+def bench_roster_page(conn, ctx):
+    return len(roster_page(conn, None, 3, 25))
+
+
+def bench_roster_slice(conn, ctx):
+    # Manage Students: a filtered keyset page deep into the school
+    after = conn.execute("SELECT MAX(id) / 2 FROM students").fetchone()[0] or 0
+    return len(roster_slice(conn, after, 25)) + len(roster_slice(conn, 0, 25, ctx["class"], "a"))
+
+
+def bench_search_students(conn, ctx):
+    # A two-letter prefix matches a large share of the school
+    return len(search_students(conn, "Aa", page_size=50)) + len(search_students(conn, "sharma 1", page_size=50))
+
+
+def bench_search_notes(conn, ctx):
+    return len(search_notes(conn, "help fractions", page_size=25))
+
+
+def bench_upload_import(conn, ctx):
+    # Upload copies of one class roster into a separate class: the first
+    # repeat inserts them, later repeats update every contact number
+    ctx["upload_round"] = ctx.get("upload_round", 0) + 1
+    base = pd.read_sql("SELECT name, roll_no, father_name, contact, photo FROM students WHERE class_section=?",
+                       conn, params=(ctx["class"],))
+    roster = pd.concat(
+        [base.assign(roll_no=base["roll_no"] + f"-{i}") for i in range(ctx["upload_copies"])],
+        ignore_index=True,
+    )
+    roster["class_section"] = f"BENCH-{ctx['class']}"
+    roster["contact"] = f"round {ctx['upload_round']}"
+    buf = io.BytesIO(roster.to_csv(index=False).encode("utf-8"))
+    result = import_students(conn, buf, "bench.csv")
+    return result["inserted"] + result["updated"]
+
+
+def bench_ai_prompt_month(conn, ctx):
+    end = date.today()
+    text, _ = build_class_context(conn, ctx["class"], end - timedelta(days=30), end)
+    return len(build_prompt(text))
+
+
+def bench_ai_prompt_year(conn, ctx):
+    end = date.today()
+    text, _ = build_class_context(conn, ctx["class"], end - timedelta(days=365), end)
+    return len(build_prompt(text))
+
+
+# Row table vs bit-packed masks for the same class-year analytics
+
+def _year():
+    end = date.today()
+    return end - timedelta(days=365), end
+
+
+def _class_rows(conn, ctx):
+    start, end = _year()
+    return pd.read_sql("""
+        SELECT a.student_id, s.name, s.roll_no, a.date, a.status
+        FROM attendance a JOIN students s ON s.id = a.student_id
+        WHERE s.class_section = ? AND a.date BETWEEN ? AND ?
+    """, conn, params=(ctx["class"], str(start), str(end)))
+
+
+def bench_rates_table(conn, ctx):
+    start, end = _year()
+    return len(pd.read_sql("""
+        SELECT student_id, COUNT(*) AS days, SUM(status = 'Present') AS present
+        FROM attendance WHERE date BETWEEN ? AND ? GROUP BY student_id
+    """, conn, params=(str(start), str(end))))
+
+
+def bench_rates_bitmap(conn, ctx):
+    return len(student_rates(conn, None, *_year()))
+
+
+def bench_streaks_table(conn, ctx):
+    empty = pd.DataFrame(columns=["student_id", "name", "date", "text"])
+    return len(student_aggregates(_class_rows(conn, ctx), empty, empty))
+
+
+def bench_streaks_bitmap(conn, ctx):
+    return len(AttendanceMatrix.load(conn, ctx["class"], *_year()).streaks())
+
+
+def bench_weekday_table(conn, ctx):
+    rows = _class_rows(conn, ctx)
+    weekday = pd.to_datetime(rows["date"]).dt.dayofweek
+    return len(rows["status"].eq("Absent").groupby([rows["student_id"], weekday]).mean().unstack())
+
+
+def bench_weekday_bitmap(conn, ctx):
+    return len(AttendanceMatrix.load(conn, ctx["class"], *_year()).weekday_pattern())
+
+
+BENCHMARKS = {
+    "mark_attendance_save": bench_mark_attendance_save,
+    "class_overview": bench_class_overview,
+    "school_overview_term": bench_school_overview_term,
+    "remarks_load_31_days": bench_remarks_load,
+    "remarks_save": bench_remarks_save,
+    "roster_page": bench_roster_page,
+    "roster_slice": bench_roster_slice,
+    "search_students": bench_search_students,
+    "search_notes": bench_search_notes,
+    "upload_import": bench_upload_import,
+    "ai_prompt_month": bench_ai_prompt_month,
+    "ai_prompt_year": bench_ai_prompt_year,
+    "school_rates_year_table": bench_rates_table,
+    "school_rates_year_bitmap": bench_rates_bitmap,
+    "class_streaks_year_table": bench_streaks_table,
+    "class_streaks_year_bitmap": bench_streaks_bitmap,
+    "class_weekday_year_table": bench_weekday_table,
+    "class_weekday_year_bitmap": bench_weekday_bitmap,
+}
+
+
+def run(db_path, repeats=5, only=None, upload_copies=20):
+    conn = connect(db_path)
+    migrate(conn)
+    ctx = {"class": _pick_class(conn), "upload_copies": upload_copies}
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("students", "attendance", "student_remarks", "activities")}
+
+    results = {}
+    for name, fn in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        timings = []
+        for _ in range(repeats):
+            clear_all()
+            with profile() as p:
+                t0 = time.perf_counter()
+                fn(conn, ctx)
+                timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        results[name] = {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(timings[0], 2),
+            "max_ms": round(timings[-1], 2),
+            "repeats": repeats,
+            "statements": p.count,  # SQL statements issued by the last repeat
+        }
+        print(f"{name:>24}: {results[name]['median_ms']:9.2f} ms (min {results[name]['min_ms']:.2f}, "
+              f"{p.count} statements)")
+    conn.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "db": db_path,
+            "rows": counts,
+            "class": ctx["class"],
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """Print current vs baseline medians; return the names that regressed."""
+    regressed = []
+    for name, res in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:>24}: new")
+            continue
+        ratio = res["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold and res["median_ms"] - base["median_ms"] >= min_delta_ms:
+            flag = "  <-- REGRESSION"
+            regressed.append(name)
+        print(f"{name:>24}: {base['median_ms']:9.2f} -> {res['median_ms']:9.2f} ms ({ratio:.2f}x){flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the data path behind each page.")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS))
+    parser.add_argument("--upload-copies", type=int, default=20,
+                        help="the import benchmark uploads this many copies of one class roster")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    current = run(args.db, args.repeats, args.only, args.upload_copies)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline['meta']['timestamp']}):")
+        if compare(current, baseline, args.threshold, args.min_delta_ms):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+"""Bit-packed attendance: one pair of 31-bit masks per student per month.
+
+    python bitmaps.py enable [--db students.db]
+    python bitmaps.py disable [--db students.db]
+    python bitmaps.py verify [--db students.db]
+    python bitmaps.py rebuild [--db students.db]
+    python bitmaps.py size [--db students.db]
+
+attendance_bitmaps holds, for every student and month, a `marked` mask
+with bit d-1 set when day d has a record and a `present` mask with the
+same bit set when that record is Present. The attendance table stays the
+source of truth and everything that reads or writes rows keeps working.
+
+The stored masks are optional and off by default. `enable` fills them
+(archived years included) and adds triggers that keep them in step with
+every attendance write, like the v6 rollups; that is a second copy of
+attendance and two more statements per written row, worth it when
+analytics over long ranges are read far more often than attendance is
+marked. Without them AttendanceMatrix builds the same masks from the
+attendance rows of the range it is asked for. `disable` drops the
+triggers and empties the table.
+
+The masks are INTEGER columns rather than BLOBs: 31 days fit in one
+SQLite integer, and the triggers can maintain them with plain bitwise
+SQL. A month costs a few bytes instead of up to 31 rows.
+
+AttendanceMatrix loads the masks for a class (or the school) and a date
+range into NumPy arrays and answers rates, absence streaks, day-of-week
+patterns and class-wide day-by-day figures without touching the rows.
+Masks of archived academic years stay when their rows move out (see
+archive.py); rebuild and verify only cover the months after them.
+"""
+import argparse
+import calendar
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from archive import archived_until, source
+
+
+def _bitmap_sql(table="attendance", where=""):
+    return f"""
+        SELECT student_id, substr(date, 1, 7) AS month,
+               SUM(1 << (CAST(substr(date, 9, 2) AS INTEGER) - 1)) AS marked,
+               SUM((status = 'Present') << (CAST(substr(date, 9, 2) AS INTEGER) - 1)) AS present
+        FROM {table}
+        WHERE student_id IS NOT NULL AND date IS NOT NULL{where}
+        GROUP BY student_id, month
+    """
+
+
+BITMAP_SQL = _bitmap_sql()
+TRIGGERS = ["trg_attendance_bitmap_insert", "trg_attendance_bitmap_delete", "trg_attendance_bitmap_update"]
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+_DAY_BITS = np.arange(31, dtype=np.int64)
+
+
+# Bit d-1 of a month's masks is day d. One row per student and day
+# (v2 unique index), so setting/clearing a bit is exact. Rows without a
+# student or date are skipped: the key cannot be NULL.
+def _set_bit(row):
+    bit = f"(1 << (CAST(substr({row}.date, 9, 2) AS INTEGER) - 1))"
+    return f"""
+        INSERT INTO attendance_bitmaps (student_id, month) SELECT {row}.student_id, substr({row}.date, 1, 7)
+            WHERE {row}.student_id IS NOT NULL AND {row}.date IS NOT NULL
+            ON CONFLICT DO NOTHING;
+        UPDATE attendance_bitmaps
+           SET marked = marked | {bit},
+               present = CASE WHEN {row}.status = 'Present' THEN present | {bit} ELSE present & ~{bit} END
+         WHERE student_id = {row}.student_id AND month = substr({row}.date, 1, 7);
+    """
+
+
+def _clear_bit(row):
+    bit = f"(1 << (CAST(substr({row}.date, 9, 2) AS INTEGER) - 1))"
+    return f"""
+        UPDATE attendance_bitmaps
+           SET marked = marked & ~{bit}, present = present & ~{bit}
+         WHERE student_id = {row}.student_id AND month = substr({row}.date, 1, 7);
+        DELETE FROM attendance_bitmaps
+         WHERE student_id = {row}.student_id AND month = substr({row}.date, 1, 7) AND marked = 0;
+    """
+
+
+def create_triggers(c):
+    """Keep the masks in step with attendance writes (caller owns the transaction)."""
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_attendance_bitmap_insert AFTER INSERT ON attendance BEGIN {_set_bit('NEW')} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_attendance_bitmap_delete AFTER DELETE ON attendance BEGIN {_clear_bit('OLD')} END")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_attendance_bitmap_update
+                  AFTER UPDATE OF student_id, date, status ON attendance
+                  BEGIN {_clear_bit('OLD')} {_set_bit('NEW')} END""")
+
+
+def drop_triggers(c):
+    for name in TRIGGERS:
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def enabled(conn, schema="main"):
+    """Whether the stored masks are kept up to date in this database."""
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'trigger' AND name = ?",
+                        (TRIGGERS[0],)).fetchone() is not None
+
+
+def fill(c, after=""):
+    """Recompute the masks after `after` (the last archived date) from the attendance table.
+
+    The caller owns the transaction.
+    """
+    c.execute("DELETE FROM attendance_bitmaps WHERE month > ?", (after,))
+    c.execute(f"INSERT INTO attendance_bitmaps (student_id, month, marked, present) {BITMAP_SQL}")
+
+
+def rebuild(conn):
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        fill(c, archived_until(conn) or "")
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def enable(conn):
+    """Store the masks from now on: fill every month, archived years included, and add the triggers."""
+    until = archived_until(conn)
+    # Attached before the transaction, which ATTACH cannot run inside
+    archived = source(conn, "attendance", None, until) if until else None
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        c.execute("DELETE FROM attendance_bitmaps")
+        if archived is not None:
+            c.execute(f"INSERT INTO attendance_bitmaps (student_id, month, marked, present) "
+                      f"{_bitmap_sql(archived, ' AND date <= ?')}", (until,))
+        fill(c, until or "")
+        create_triggers(c)
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def disable(conn):
+    """Stop storing the masks: drop the triggers and free the table's rows."""
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        drop_triggers(c)
+        c.execute("DELETE FROM attendance_bitmaps")
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def verify(conn):
+    """Return the (student_id, month) masks that disagree with the attendance table."""
+    expected = pd.read_sql(BITMAP_SQL, conn)
+    stored = pd.read_sql("SELECT student_id, month, marked, present FROM attendance_bitmaps WHERE month > ?",
+                         conn, params=(archived_until(conn) or "",))
+    merged = expected.merge(stored, on=["student_id", "month"], how="outer",
+                            suffixes=("_expected", "_stored")).fillna(0)
+    bad = (merged["marked_expected"] != merged["marked_stored"]) | (merged["present_expected"] != merged["present_stored"])
+    return merged[bad].reset_index(drop=True)
+
+
+def popcount(masks):
+    """Number of set bits in each element of an integer array."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+        return np.bitwise_count(masks).astype(np.int64)
+    masks = masks - ((masks >> 1) & 0x55555555)
+    masks = (masks & 0x33333333) + ((masks >> 2) & 0x33333333)
+    return ((((masks + (masks >> 4)) & 0x0F0F0F0F) * 0x01010101) >> 24).astype(np.int64)
+
+
+def _month_window(month, start, end):
+    """Mask of the days of `month` ('YYYY-MM') that fall inside [start, end]."""
+    year, mon = int(month[:4]), int(month[5:7])
+    first, last = 1, calendar.monthrange(year, mon)[1]
+    if start is not None and start[:7] == month:
+        first = int(start[8:10])
+    if end is not None and end[:7] == month:
+        last = int(end[8:10])
+    return ((1 << last) - 1) & ~((1 << (first - 1)) - 1)
+
+
+def _load_masks(conn, class_section, start, end):
+    in_class = "student_id IN (SELECT id FROM students WHERE class_section = ?)"
+    params = []
+    clauses = []
+    if enabled(conn):
+        query = """SELECT b.student_id, b.month, b.marked, b.present
+                   FROM attendance_bitmaps b"""
+        if class_section is not None:
+            clauses.append("b." + in_class)
+            params.append(str(class_section).strip())
+    else:
+        # No stored masks: build them from the rows of the range
+        where = ""
+        if class_section is not None:
+            where += " AND " + in_class
+            params.append(str(class_section).strip())
+        if start is not None:
+            where += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            where += " AND date <= ?"
+            params.append(end)
+        rows_sql = _bitmap_sql(source(conn, "attendance", start, end), where)
+        query = f"SELECT b.student_id, b.month, b.marked, b.present FROM ({rows_sql}) b"
+    if start is not None:
+        clauses.append("b.month >= ?")
+        params.append(start[:7])
+    if end is not None:
+        clauses.append("b.month <= ?")
+        params.append(end[:7])
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    rows = conn.execute(query + " ORDER BY b.student_id, b.month", params).fetchall()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, np.empty(0, dtype=object), empty, empty
+    student_ids, months, marked, present = zip(*rows)
+    marked, present = np.array(marked, dtype=np.int64), np.array(present, dtype=np.int64)
+    months = np.array(months, dtype=object)
+
+    # Trim the first/last month to the requested days with one AND per row
+    if start is not None or end is not None:
+        windows = {m: _month_window(m, start, end) for m in set(months)}
+        window = np.array([windows[m] for m in months], dtype=np.int64)
+        marked &= window
+        present &= window
+    return np.array(student_ids, dtype=np.int64), months, marked, present
+
+
+def student_rates(conn, class_section=None, start_date=None, end_date=None):
+    """Days marked, present and attendance % per student, by popcount over the masks."""
+    start = str(start_date) if start_date is not None else None
+    end = str(end_date) if end_date is not None else None
+    student_ids, _, marked, present = _load_masks(conn, class_section, start, end)
+    df = pd.DataFrame({"student_id": student_ids, "days": popcount(marked), "present": popcount(present)})
+    df = df.groupby("student_id", as_index=False).sum()
+    df["Attendance %"] = (df["present"] / df["days"].where(df["days"] > 0) * 100).round(2).fillna(0)
+    return df
+
+
+class AttendanceMatrix:
+    """Students x calendar days, as two boolean arrays.
+
+    marked[i, j] / present[i, j] describe student student_ids[i] on
+    dates[j]. Only days on which somebody in the selection was marked are
+    kept, so weekends and holidays do not break absence streaks.
+    """
+
+    def __init__(self, student_ids, dates, marked, present):
+        self.student_ids = student_ids
+        self.dates = dates
+        self.marked = marked
+        self.present = present
+
+    @classmethod
+    def load(cls, conn, class_section=None, start_date=None, end_date=None):
+        start = str(start_date) if start_date is not None else None
+        end = str(end_date) if end_date is not None else None
+        student_ids, months, marked, present = _load_masks(conn, class_section, start, end)
+        if len(student_ids) == 0:
+            return cls(student_ids, np.empty(0, dtype="datetime64[D]"),
+                       np.zeros((0, 0), dtype=bool), np.zeros((0, 0), dtype=bool))
+
+        # One column per calendar day of the months involved, 31 slots each
+        ids, row = np.unique(student_ids, return_inverse=True)
+        month_list = sorted(set(months))
+        month_pos = {m: i for i, m in enumerate(month_list)}
+        col = np.array([month_pos[m] for m in months]) * 31
+
+        marked_bits = ((marked[:, None] >> _DAY_BITS) & 1).astype(bool)
+        present_bits = ((present[:, None] >> _DAY_BITS) & 1).astype(bool)
+        full_marked = np.zeros((len(ids), len(month_list) * 31), dtype=bool)
+        full_present = np.zeros_like(full_marked)
+        cols = col[:, None] + _DAY_BITS
+        full_marked[row[:, None], cols] = marked_bits
+        full_present[row[:, None], cols] = present_bits
+
+        # Drop slots nobody was marked on (weekends, holidays, day 31 of short months)
+        school_days = full_marked.any(axis=0)
+        slots = np.flatnonzero(school_days)
+        first_days = np.array([np.datetime64(f"{m}-01") for m in month_list])
+        dates = first_days[slots // 31] + (slots % 31).astype("timedelta64[D]")
+        return cls(ids, dates, full_marked[:, school_days], full_present[:, school_days])
+
+    @property
+    def absent(self):
+        return self.marked & ~self.present
+
+    def rates(self):
+        days = self.marked.sum(axis=1)
+        present = self.present.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(days > 0, present / np.maximum(days, 1) * 100, 0.0)
+        return pd.DataFrame({"student_id": self.student_ids, "days": days, "present": present,
+                             "Attendance %": pct.round(2)})
+
+    def streaks(self):
+        """Longest and current run of consecutive absences per student."""
+        absent = self.absent.astype(np.int32)
+        if absent.shape[1] == 0:
+            zeros = np.zeros(len(self.student_ids), dtype=np.int64)
+            return pd.DataFrame({"student_id": self.student_ids, "longest_absence": zeros, "current_absence": zeros})
+        # Running count of absences, restarted at every day the student was not absent
+        total = np.cumsum(absent, axis=1)
+        restart = np.maximum.accumulate(np.where(absent == 0, total, 0), axis=1)
+        run = total - restart
+        return pd.DataFrame({"student_id": self.student_ids,
+                             "longest_absence": run.max(axis=1), "current_absence": run[:, -1]})
+
+    def weekday_pattern(self):
+        """Absence % per student per weekday (columns Mon..Sun, NaN when never marked)."""
+        weekday = (self.dates.astype("datetime64[D]").astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        onehot = weekday[:, None] == np.arange(7)
+        marked = self.marked.astype(np.int32) @ onehot
+        absent = self.absent.astype(np.int32) @ onehot
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(marked > 0, absent / np.maximum(marked, 1) * 100, np.nan)
+        df = pd.DataFrame(pct.round(1), columns=WEEKDAYS)
+        df.insert(0, "student_id", self.student_ids)
+        return df.dropna(axis=1, how="all")
+
+    def daily(self):
+        """Class-wide students marked, present and attendance % per school day."""
+        marked = self.marked.sum(axis=0)
+        present = self.present.sum(axis=0)
+        return pd.DataFrame({
+            "date": pd.to_datetime(self.dates).strftime("%Y-%m-%d"),
+            "marked": marked,
+            "present": present,
+            "Attendance %": (present / np.maximum(marked, 1) * 100).round(2),
+        })
+
+
+def table_size(conn, table):
+    """Bytes used by a table and its indexes, or None when dbstat is not compiled in."""
+    try:
+        return conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = ? OR name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?)",
+            (table, table),
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+
+def main(argv=None):
+    from db import DB_PATH, get_pool
+
+    parser = argparse.ArgumentParser(description="Turn on, off, rebuild, verify or size the attendance bitmaps.")
+    parser.add_argument("command", choices=["enable", "disable", "verify", "rebuild", "size"])
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    with get_pool(args.db).connection() as conn:
+        if args.command == "enable":
+            enable(conn)
+            print("Attendance bitmaps filled; attendance writes keep them up to date from now on.")
+            return 0
+        if args.command == "disable":
+            disable(conn)
+            print("Attendance bitmaps turned off; analytics read attendance rows.")
+            return 0
+        if args.command == "size":
+            for table in ("attendance", "attendance_bitmaps"):
+                size = table_size(conn, table)
+                print(f"{table:>20}: {'unknown' if size is None else f'{size / 1024:,.0f} KiB'}")
+            return 0
+        if not enabled(conn):
+            print("Attendance bitmaps are off; turn them on with `bitmaps.py enable`.")
+            return 1
+        if args.command == "rebuild":
+            rebuild(conn)
+            print("Attendance bitmaps rebuilt.")
+            return 0
+        problems = verify(conn)
+    if problems.empty:
+        print("Attendance bitmaps are in sync with attendance.")
+        return 0
+    print(f"{len(problems)} bitmaps out of sync:")
+    print(problems.to_string(index=False))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# ---------- QUERY CACHE ----------
+# Streamlit reruns the whole script on every interaction, so the same
+# roster/class queries run again and again. Read functions decorated with
+# @cached(<tables>) keep their results in a per-function LRU bounded by
+# size and TTL. Every write path calls bump(<table>), which raises that
+# table's version and drops only the caches that read from it.
+#
+# With several schools (tenants.py) each database gets its own partition
+# in every cache, with its own LRU budget: results are keyed by the
+# connection's database, and bump(..., conn=conn) only drops that
+# database's entries, so one school's writes never evict another's reads.
+
+DEFAULT_MAXSIZE = 128
+DEFAULT_TTL = 600  # seconds; bounds staleness from writers in other processes
+
+_lock = threading.RLock()
+_versions = {}
+_caches = []
+
+
+def database(conn):
+    """The cache partition of a connection: its database file (see db.connect)."""
+    return getattr(conn, "path", None)
+
+
+def version(table, conn=None):
+    return _versions.get((database(conn), table), 0)
+
+
+def bump(*tables, conn=None):
+    """Record a write to `tables` and invalidate every cache that depends on them.
+
+    With `conn`, only the entries read from that connection's database
+    are dropped; without it (or for a connection not opened by
+    db.connect), every database's.
+    """
+    db = database(conn)
+    with _lock:
+        for table in tables:
+            _versions[(db, table)] = _versions.get((db, table), 0) + 1
+        for cache in _caches:
+            if cache.tables.intersection(tables):
+                cache.clear(db)
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return str(value) if not isinstance(value, (int, float, str, type(None))) else value
+
+
+def _copy(value):
+    # Callers are free to modify returned frames without touching the cache
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    return value
+
+
+class _Cache:
+    def __init__(self, name, tables, maxsize, ttl):
+        self.name = name
+        self.tables = frozenset(tables)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.partitions = {}  # database -> OrderedDict of key -> (time, value)
+        self.hits = 0
+        self.misses = 0
+        self._epoch = 0  # raised by clearing every database
+        self._generations = {}  # database -> raised by clearing that database
+
+    def generation(self, db):
+        with _lock:
+            return self._epoch, self._generations.get(db, 0)
+
+    def get(self, db, key):
+        with _lock:
+            entries = self.partitions.get(db, {})
+            entry = entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, db, key, value, generation):
+        with _lock:
+            # A write landed while the query ran; the result may be stale
+            if generation != (self._epoch, self._generations.get(db, 0)):
+                return
+            entries = self.partitions.setdefault(db, OrderedDict())
+            entries[key] = (time.monotonic(), value)
+            entries.move_to_end(key)
+            while len(entries) > self.maxsize:
+                entries.popitem(last=False)
+
+    def clear(self, db=None):
+        with _lock:
+            if db is None:
+                self.partitions.clear()
+                self._epoch += 1
+            else:
+                self.partitions.pop(db, None)
+                self._generations[db] = self._generations.get(db, 0) + 1
+
+    def __len__(self):
+        with _lock:
+            return sum(len(entries) for entries in self.partitions.values())
+
+
+def cached(*tables, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+    """Cache a `fn(conn, *args, **kwargs)` read that depends on `tables`.
+
+    The key is the connection's database plus every other argument; each
+    database keeps up to `maxsize` entries of its own.
+    """
+    def decorator(fn):
+        cache = _Cache(fn.__qualname__, tables, maxsize, ttl)
+        with _lock:
+            _caches.append(cache)
+
+        @functools.wraps(fn)
+        def wrapper(conn, *args, **kwargs):
+            db, key = database(conn), (_freeze(args), _freeze(kwargs))
+            hit, value = cache.get(db, key)
+            if not hit:
+                generation = cache.generation(db)
+                value = fn(conn, *args, **kwargs)
+                cache.put(db, key, value, generation)
+            return _copy(value)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def clear_all():
+    with _lock:
+        for cache in _caches:
+            cache.clear()
+
+
+def cache_stats():
+    """Hit/miss counters and current size for every cached function."""
+    with _lock:
+        rows = [
+            {
+                "query": cache.name,
+                "tables": ", ".join(sorted(cache.tables)),
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "entries": len(cache),
+                "databases": len(cache.partitions),
+            }
+            for cache in _caches
+        ]
+    return pd.DataFrame(rows, columns=["query", "tables", "hits", "misses", "entries", "databases"])
@@ -0,0 +1,170 @@
+import pandas as pd
+
+from archive import source
+from attendance_stats import LOW_ATTENDANCE_THRESHOLD, attendance_summary, class_summary, class_trend
+from cache import cached
+from students import class_list, count_students
+
+
+# ---------- ATTENDANCE CHARTS ----------
+# Charts are Vega-Lite specs drawn by the browser (st.vega_lite_chart), so
+# a rerun only ships a small JSON document: no figures are built or kept
+# on the server. Specs are cached like the queries behind them, keyed by
+# class and date range and dropped when students/attendance change. Long
+# ranges are bucketed by week or month so a spec never carries more than
+# a few thousand points, however many years are selected.
+
+MAX_TREND_POINTS = 120
+MAX_HEATMAP_COLUMNS = 60
+MAX_HEATMAP_CELLS = 4000
+PERIODS = (("day", 1), ("week", 7), ("month", 30.44))
+
+_PERCENT_AXIS = {"field": "Attendance %", "type": "quantitative", "scale": {"domain": [0, 100]}}
+
+
+def pick_period(days, max_points):
+    """The finest of day/week/month that keeps `days` under `max_points` buckets."""
+    for name, length in PERIODS:
+        if days / length <= max_points:
+            return name
+    return PERIODS[-1][0]
+
+
+def bucket(dates, period):
+    """Map ISO date strings to the first day of their day/week/month bucket."""
+    dates = pd.to_datetime(dates)
+    if period == "week":
+        dates = dates - pd.to_timedelta(dates.dt.weekday, unit="D")
+    elif period == "month":
+        dates = dates.dt.to_period("M").dt.start_time
+    return dates.dt.strftime("%Y-%m-%d")
+
+
+def _rollup(df, keys, period):
+    """Sum marked/present per key and bucket, then recompute the percentage."""
+    df = df.assign(date=bucket(df["date"], period))
+    out = df.groupby(keys + ["date"], as_index=False)[["marked", "present"]].sum()
+    out["Attendance %"] = (out["present"] / out["marked"].where(out["marked"] > 0) * 100).round(1).fillna(0)
+    return out
+
+
+def _threshold_rule():
+    return {
+        "mark": {"type": "rule", "strokeDash": [4, 4], "color": "#d62728"},
+        "encoding": {"y": {"datum": LOW_ATTENDANCE_THRESHOLD}},
+    }
+
+
+def _date_bounds(conn, class_section, start_date, end_date):
+    if start_date is not None and end_date is not None:
+        return str(start_date), str(end_date)
+    query, params = "SELECT MIN(date), MAX(date) FROM class_daily", []
+    if class_section is not None:
+        query += " WHERE class_section = ?"
+        params.append(str(class_section).strip())
+    first, last = conn.execute(query, params).fetchone()
+    return (str(start_date) if start_date is not None else first,
+            str(end_date) if end_date is not None else last)
+
+
+@cached("students", "attendance")
+def summary_chart(conn, class_section=None, start_date=None, end_date=None):
+    """Bar per student (one class) or per class (whole school), with the threshold line."""
+    df = attendance_summary(conn, class_section, start_date, end_date)
+    if class_section is None:
+        df, label = class_summary(df), "Class/Section"
+    else:
+        label = "Name"
+    values = df[[label, "Attendance %", "Present", "Total Days"]].to_dict("records")
+    return {
+        "data": {"values": values},
+        "layer": [
+            {
+                "mark": {"type": "bar", "tooltip": True},
+                "encoding": {
+                    "x": {"field": label, "type": "nominal", "sort": None, "axis": {"labelAngle": -45}},
+                    "y": _PERCENT_AXIS,
+                    "color": {"condition": {"test": f"datum['Attendance %'] < {LOW_ATTENDANCE_THRESHOLD}",
+                                            "value": "#d62728"}, "value": "#4c78a8"},
+                },
+            },
+            _threshold_rule(),
+        ],
+    }
+
+
+@cached("students", "attendance")
+def trend_chart(conn, class_section=None, start_date=None, end_date=None):
+    """Attendance % over time from the class_daily rollup; (spec, period) or (None, None)."""
+    trend = class_trend(conn, class_section, start_date, end_date)
+    if trend.empty:
+        return None, None
+    span = (pd.Timestamp(trend["date"].iloc[-1]) - pd.Timestamp(trend["date"].iloc[0])).days + 1
+    period = pick_period(span, MAX_TREND_POINTS)
+    df = _rollup(trend[["date", "marked", "present"]], [], period)
+    return {
+        "data": {"values": df.to_dict("records")},
+        "layer": [
+            {
+                "mark": {"type": "line", "point": len(df) <= 60, "tooltip": True},
+                "encoding": {
+                    "x": {"field": "date", "type": "temporal", "title": f"Date (per {period})"},
+                    "y": _PERCENT_AXIS,
+                },
+            },
+            _threshold_rule(),
+        ],
+    }, period
+
+
+@cached("students", "attendance")
+def heatmap_chart(conn, class_section=None, start_date=None, end_date=None):
+    """Students (one class) or classes (whole school) by day/week/month; (spec, period) or (None, None)."""
+    start, end = _date_bounds(conn, class_section, start_date, end_date)
+    if start is None or end is None:
+        return None, None
+    # Fewer, wider columns for big classes so the cell count stays bounded
+    rows = len(class_list(conn)) if class_section is None else count_students(conn, class_section)
+    columns = max(1, min(MAX_HEATMAP_COLUMNS, MAX_HEATMAP_CELLS // max(rows, 1)))
+    period = pick_period((pd.Timestamp(end) - pd.Timestamp(start)).days + 1, columns)
+
+    if class_section is None:
+        df = pd.read_sql("""
+            SELECT class_section AS label, date, students_marked AS marked, present
+            FROM class_daily WHERE date BETWEEN ? AND ?
+        """, conn, params=(start, end))
+    elif period == "month":
+        # Monthly buckets come straight from the rollup; the first and last
+        # month count whole months even when the range starts/ends mid-month
+        df = pd.read_sql("""
+            SELECT s.name || ' (' || s.roll_no || ')' AS label, m.month || '-01' AS date,
+                   m.days AS marked, m.present
+            FROM attendance_monthly m
+            JOIN students s ON s.id = m.student_id
+            WHERE s.class_section = ? AND m.month BETWEEN substr(?, 1, 7) AND substr(?, 1, 7)
+        """, conn, params=(str(class_section).strip(), start, end))
+    else:
+        df = pd.read_sql(f"""
+            SELECT s.name || ' (' || s.roll_no || ')' AS label, a.date,
+                   1 AS marked, a.status = 'Present' AS present
+            FROM {source(conn, "attendance", start, end)} a
+            JOIN students s ON s.id = a.student_id
+            WHERE s.class_section = ? AND a.date BETWEEN ? AND ?
+        """, conn, params=(str(class_section).strip(), start, end))
+    if df.empty:
+        return None, None
+
+    df = _rollup(df, ["label"], period)[["label", "date", "Attendance %"]]
+    row_title = "Class/Section" if class_section is None else "Student"
+    return {
+        "data": {"values": df.to_dict("records")},
+        "mark": {"type": "rect", "tooltip": True},
+        "height": {"step": 14},
+        "encoding": {
+            "x": {"field": "date", "type": "ordinal", "title": f"Date (per {period})",
+                  "axis": {"labelAngle": -45, "labelOverlap": True}},
+            "y": {"field": "label", "type": "nominal", "title": row_title},
+            "color": {"field": "Attendance %", "type": "quantitative",
+                      "scale": {"domain": [0, 100], "scheme": "redyellowgreen"}},
+        },
+    }, period
@@ -0,0 +1,155 @@
+import functools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from migrations import migrate
+from profiler import ProfiledConnection
+
+
+# ---------- CONNECTION MANAGEMENT ----------
+# Every Streamlit session runs its script in its own thread. Instead of
+# one shared connection and cursor, each thread borrows a connection from
+# a bounded per-database pool. Connections use WAL so readers never wait
+# for a writer, and writers wait (busy_timeout) rather than failing.
+
+DB_PATH = os.environ.get("TRACKMYCLASS_DB", "students.db")
+POOL_SIZE = int(os.environ.get("TRACKMYCLASS_POOL_SIZE", "8"))
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 20000
+ACQUIRE_TIMEOUT = 30  # seconds to wait for a free connection
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+def connect(path=DB_PATH):
+    """Open a connection with the app's pragmas applied."""
+    conn = sqlite3.connect(
+        path,
+        check_same_thread=False,  # pooled connections move between threads
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level="IMMEDIATE",  # take the write lock up front, no upgrade deadlocks
+        factory=ProfiledConnection,  # statements are timed while a profile is active
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, far fewer fsyncs
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.path = os.path.abspath(path)  # query caches are kept per database file
+    return conn
+
+
+class ConnectionPool:
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = []
+        self._owners = {}  # thread -> connection checked out by thread_connection()
+        self._opened = 0
+        self._cond = threading.Condition()
+
+    def _reclaim(self):
+        # Connections held by threads that have finished go back to the pool
+        for thread in [t for t in self._owners if not t.is_alive()]:
+            conn = self._owners.pop(thread)
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._reclaim()
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No free database connection after {timeout}s ({self.size} in use).")
+                self._cond.wait(min(remaining, 0.1))
+        try:
+            return connect(self.path)
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+            raise
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def thread_connection(self):
+        """The connection owned by the current thread, borrowed on first use.
+
+        It returns to the pool automatically once the thread has exited,
+        which suits Streamlit's one-thread-per-script-run model.
+        """
+        thread = threading.current_thread()
+        with self._cond:
+            conn = self._owners.get(thread)
+        if conn is None:
+            conn = self.acquire()
+            with self._cond:
+                self._owners[thread] = conn
+        return conn
+
+    def stats(self):
+        with self._cond:
+            return {"size": self.size, "opened": self._opened,
+                    "idle": len(self._idle), "owned": len(self._owners)}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """One pool per database file; the schema is migrated when it is created."""
+    path = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(path)
+            with pool.connection() as conn:
+                migrate(conn)
+            _pools[path] = pool
+        return pool
+
+
+def retry_locked(fn=None, attempts=5, delay=0.05):
+    """Retry a write when SQLite still reports `database is locked`
+    after busy_timeout, backing off between attempts."""
+    if fn is None:
+        return functools.partial(retry_locked, attempts=attempts, delay=delay)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(attempts):
+            try:
+                return fn(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(delay * (2 ** attempt))
+    return wrapper
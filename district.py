@@ -0,0 +1,132 @@
+"""District office: the same statistics from every school, side by side.
+
+    python district.py [--start 2025-06-01] [--end 2026-05-31] [--classes] [--workers 8] [--out district.csv]
+
+A query runs against every school's database (tenants.py) at once, one
+thread per school with a connection from that school's pool; SQLite
+releases the GIL while it works and each school is a separate file, so
+they do not wait on each other. The per-school frames are merged into
+one with a School column. District totals are summed from the counts
+and their percentages worked out again, never averaged. A school whose
+database cannot be read is reported and left out, rather than failing
+the whole overview. Only the Flagged Now column is not for the chosen
+dates but for today.
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import pandas as pd
+
+from archive import academic_year, year_range
+from attendance_stats import add_percentage, attendance_summary, below_threshold, class_summary
+from db import get_pool
+from tenants import load_tenants
+
+
+MAX_WORKERS = 8
+DISTRICT = "District"
+TOTAL = "total"  # index label of the district totals row, so no school's name can be mistaken for it
+
+
+def _run(tenant, query, args):
+    with get_pool(tenant.db).connection() as conn:
+        return query(conn, *args)
+
+
+def fan_out(query, *args, tenants=None, workers=None):
+    """Run `query(conn, *args)` on every school in parallel and stack the frames.
+
+    Returns (frame with a leading School column, {school name: error}),
+    schools in registry order.
+    """
+    tenants = list((load_tenants() if tenants is None else tenants).values())
+    frames, errors = {}, {}
+    if not tenants:
+        return pd.DataFrame(columns=["School"]), errors
+    with ThreadPoolExecutor(max_workers=workers or min(len(tenants), MAX_WORKERS),
+                            thread_name_prefix="district") as pool:
+        futures = {pool.submit(_run, tenant, query, args): tenant for tenant in tenants}
+        for future in as_completed(futures):
+            tenant = futures[future]
+            try:
+                frames[tenant.slug] = future.result().assign(School=tenant.name)
+            except Exception as e:
+                errors[tenant.name] = e
+    ordered = [frames[t.slug] for t in tenants if t.slug in frames]
+    if not ordered:
+        return pd.DataFrame(columns=["School"]), errors
+    merged = pd.concat(ordered, ignore_index=True)
+    return merged[["School"] + [c for c in merged.columns if c != "School"]], errors
+
+
+# ---------- PER-SCHOOL QUERIES ----------
+# Each takes one school's connection; attendance_summary caches per database.
+
+def school_totals(conn, start_date, end_date):
+    """One row: students, classes, days marked, present and how many are below the threshold.
+
+    "Flagged Now" ignores the dates: early warnings only exist for today
+    (early_warning.py), so it counts the students flagged at the last run.
+    """
+    students = attendance_summary(conn, None, start_date, end_date)
+    flagged = conn.execute("SELECT COUNT(DISTINCT student_id) FROM early_warnings").fetchone()[0]
+    return pd.DataFrame([{
+        "Students": len(students),
+        "Classes": students["Class/Section"].nunique(),
+        "Total Days": int(students["Total Days"].sum()),
+        "Present": int(students["Present"].sum()),
+        "Below Threshold": len(below_threshold(students[students["Total Days"] > 0])),
+        "Flagged Now": flagged,
+    }])
+
+
+def class_totals(conn, start_date, end_date):
+    return class_summary(attendance_summary(conn, None, start_date, end_date))
+
+
+# ---------- MERGED ----------
+
+def district_summary(start_date, end_date, tenants=None, workers=None):
+    """One row per school plus the District row, indexed TOTAL; returns (frame, errors)."""
+    schools, errors = fan_out(school_totals, start_date, end_date, tenants=tenants, workers=workers)
+    if schools.empty:
+        return schools, errors
+    total = schools.drop(columns="School").sum().to_frame(TOTAL).T.assign(School=DISTRICT)
+    merged = pd.concat([schools, total])
+    return add_percentage(merged), errors
+
+
+def district_classes(start_date, end_date, tenants=None, workers=None):
+    """One row per class of every school; returns (frame, errors)."""
+    return fan_out(class_totals, start_date, end_date, tenants=tenants, workers=workers)
+
+
+def main(argv=None):
+    this_year = year_range(academic_year(date.today()))
+    parser = argparse.ArgumentParser(description="Attendance of every school in the registry, side by side.")
+    parser.add_argument("--start", default=this_year[0])
+    parser.add_argument("--end", default=this_year[1])
+    parser.add_argument("--classes", action="store_true", help="one row per class instead of per school")
+    parser.add_argument("--workers", type=int, help=f"schools queried at once (default: up to {MAX_WORKERS})")
+    parser.add_argument("--out", help="write CSV here instead of printing")
+    args = parser.parse_args(argv)
+
+    if not load_tenants():
+        print("No schools registered; see tenants.py.")
+        return 1
+    report = district_classes if args.classes else district_summary
+    df, errors = report(args.start, args.end, workers=args.workers)
+    for school, error in errors.items():
+        print(f"{school}: skipped ({error})", file=sys.stderr)
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"{len(df)} rows -> {args.out}")
+    else:
+        print(df.to_string(index=False))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""School-wide early-warning job: flag students who need attention.
+
+    python early_warning.py [--db students.db] [--workers 4] [--full]
+
+Every class is analysed on its own, so with many classes to do they are
+spread over a process pool (smaller runs stay in-process, where they are
+faster than starting workers). Each worker reads one class as attendance
+bitmaps (stored ones when turned on, see bitmaps.py) and from the
+remarks/notes tables and returns its flags. The parent process writes
+all results, so there is only ever one writer. A class is only
+re-analysed when its class_revisions counter has moved since the last
+run (any attendance, remark, note or roster write bumps it), or when the
+last run was on an earlier day, because the windows are relative to
+today. --full re-analyses every class.
+
+Rules (all windows in calendar days, ending today):
+  low_attendance    below LOW_ATTENDANCE_THRESHOLD over the last 30 days
+  absence_streak    absent on the last 3+ school days in a row
+  sudden_drop       last 14 days at least 20 points below the 60 before
+  negative_remarks  3+ negative remarks/notes in the last 30 days, and
+                    more than in the 30 days before
+"""
+import argparse
+import multiprocessing
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from archive import source
+from attendance_stats import LOW_ATTENDANCE_THRESHOLD
+from bitmaps import AttendanceMatrix
+from cache import bump, cached
+from db import DB_PATH, connect, get_pool
+
+
+RATE_WINDOW_DAYS = 30
+MIN_MARKED_DAYS = 5  # fewer marked days than this is too little to judge a rate
+STREAK_DAYS = 3
+DROP_RECENT_DAYS = 14
+DROP_BASELINE_DAYS = 60
+DROP_POINTS = 20
+REMARK_WINDOW_DAYS = 30
+MIN_NEGATIVE_REMARKS = 3
+POOL_MIN_CLASSES = 50  # below this, starting pool processes costs more than it saves
+
+RULES = {
+    "low_attendance": "Low attendance",
+    "absence_streak": "Absence streak",
+    "sudden_drop": "Sudden drop",
+    "negative_remarks": "Negative remarks",
+}
+
+NEGATIVE = re.compile(
+    r"\b(?:late|absent|did ?n[o']t|not (?:submit|complete|bring)|forgot|distract\w*|talk(?:s|ing)? during|"
+    r"rude|fight\w*|bull(?:y|ied|ying)|careless|incomplete|missing|disrupt\w*|sleep\w*|unprepared|poor)\b",
+    re.IGNORECASE,
+)
+
+
+def _window_rate(matrix, since, until=None):
+    """(marked, present) per student over dates in [since, until)."""
+    cols = matrix.dates >= np.datetime64(since)
+    if until is not None:
+        cols &= matrix.dates < np.datetime64(until)
+    return matrix.marked[:, cols].sum(axis=1), matrix.present[:, cols].sum(axis=1)
+
+
+def _pct(present, marked):
+    return np.where(marked > 0, present / np.maximum(marked, 1) * 100, np.nan)
+
+
+def analyze_class(conn, class_section, today):
+    """Flags for one class as (student_id, rule, value, detail) tuples."""
+    flags = []
+    lookback = today - timedelta(days=DROP_RECENT_DAYS + DROP_BASELINE_DAYS)
+    matrix = AttendanceMatrix.load(conn, class_section, lookback, today)
+
+    if len(matrix.student_ids):
+        marked, present = _window_rate(matrix, today - timedelta(days=RATE_WINDOW_DAYS - 1))
+        rate = _pct(present, marked)
+        for i in np.flatnonzero((marked >= MIN_MARKED_DAYS) & (rate < LOW_ATTENDANCE_THRESHOLD)):
+            flags.append((int(matrix.student_ids[i]), "low_attendance", round(float(rate[i]), 1),
+                          f"{rate[i]:.0f}% present over the last {RATE_WINDOW_DAYS} days ({present[i]}/{marked[i]})"))
+
+        streaks = matrix.streaks()
+        for row in streaks[streaks["current_absence"] >= STREAK_DAYS].itertuples():
+            flags.append((int(row.student_id), "absence_streak", float(row.current_absence),
+                          f"absent for the last {row.current_absence} school days"))
+
+        split = today - timedelta(days=DROP_RECENT_DAYS - 1)
+        recent_marked, recent_present = _window_rate(matrix, split)
+        base_marked, base_present = _window_rate(matrix, lookback, split)
+        recent, base = _pct(recent_present, recent_marked), _pct(base_present, base_marked)
+        drop = base - recent
+        dropped = (recent_marked >= MIN_MARKED_DAYS) & (base_marked >= MIN_MARKED_DAYS) & (drop >= DROP_POINTS)
+        for i in np.flatnonzero(dropped):
+            flags.append((int(matrix.student_ids[i]), "sudden_drop", round(float(drop[i]), 1),
+                          f"{recent[i]:.0f}% in the last {DROP_RECENT_DAYS} days, down from {base[i]:.0f}%"))
+
+    since = today - timedelta(days=2 * REMARK_WINDOW_DAYS - 1)
+    texts = pd.read_sql(f"""
+        SELECT r.student_id, r.date, r.remark AS text FROM {source(conn, "student_remarks", since, today)} r
+        WHERE r.student_id IN (SELECT id FROM students WHERE class_section = ?) AND r.date BETWEEN ? AND ?
+        UNION ALL
+        SELECT a.student_id, a.date, a.note FROM {source(conn, "activities", since, today)} a
+        WHERE a.student_id IN (SELECT id FROM students WHERE class_section = ?) AND a.date BETWEEN ? AND ?
+    """, conn, params=(class_section, str(since), str(today)) * 2)
+    negative = texts[texts["text"].fillna("").str.contains(NEGATIVE)]
+    if not negative.empty:
+        recent_from = str(today - timedelta(days=REMARK_WINDOW_DAYS - 1))
+        counts = pd.crosstab(negative["student_id"], negative["date"] >= recent_from)
+        counts = counts.reindex(columns=[False, True], fill_value=0)
+        trending = counts[(counts[True] >= MIN_NEGATIVE_REMARKS) & (counts[True] > counts[False])]
+        for sid, row in trending.iterrows():
+            flags.append((int(sid), "negative_remarks", float(row[True]),
+                          f"{row[True]} negative remarks/notes in the last {REMARK_WINDOW_DAYS} days "
+                          f"({row[False]} in the {REMARK_WINDOW_DAYS} before)"))
+    return flags
+
+
+def _worker(path, class_section, today):
+    # Runs in a pool process: its own read-only connection, nothing cached across classes
+    conn = connect(path)
+    try:
+        return class_section, analyze_class(conn, class_section, today)
+    finally:
+        conn.close()
+
+
+def pending_classes(conn, today, full=False):
+    """Classes whose data changed since their last run, or last run before today."""
+    rows = conn.execute("""
+        SELECT DISTINCT COALESCE(s.class_section, '') AS class_section,
+               COALESCE(r.revision, 0), w.revision, w.run_date
+        FROM students s
+        LEFT JOIN class_revisions r ON r.class_section = COALESCE(s.class_section, '')
+        LEFT JOIN early_warning_runs w ON w.class_section = COALESCE(s.class_section, '')
+    """).fetchall()
+    return {cls: revision for cls, revision, done_revision, run_date in rows
+            if full or done_revision != revision or run_date != str(today)}
+
+
+def _save(conn, class_section, revision, flags, today):
+    now = datetime.now().isoformat(timespec="seconds")
+    with conn:
+        conn.execute("DELETE FROM early_warnings WHERE class_section = ?", (class_section,))
+        # Upsert: a warning of a student who has just moved here may still sit under their old class
+        conn.executemany(
+            """INSERT INTO early_warnings (student_id, rule, class_section, value, detail, computed_at) VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (student_id, rule) DO UPDATE
+                  SET class_section = excluded.class_section, value = excluded.value,
+                      detail = excluded.detail, computed_at = excluded.computed_at""",
+            [(sid, rule, class_section, value, detail, now) for sid, rule, value, detail in flags],
+        )
+        conn.execute("""
+            INSERT INTO early_warning_runs (class_section, revision, run_date, finished_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (class_section) DO UPDATE
+               SET revision = excluded.revision, run_date = excluded.run_date, finished_at = excluded.finished_at
+        """, (class_section, revision, str(today), now))
+
+
+def run(path, workers=None, full=False, today=None, progress=None):
+    """Analyse the classes that need it; return {"classes", "skipped", "flags"}."""
+    today = today or date.today()
+    with get_pool(path).connection() as conn:
+        pending = pending_classes(conn, today, full)
+        total = conn.execute("SELECT COUNT(DISTINCT COALESCE(class_section, '')) FROM students").fetchone()[0]
+        # Classes that no longer have students keep no warnings
+        with conn:
+            conn.execute("DELETE FROM early_warnings WHERE class_section NOT IN (SELECT COALESCE(class_section, '') FROM students)")
+            conn.execute("DELETE FROM early_warning_runs WHERE class_section NOT IN (SELECT COALESCE(class_section, '') FROM students)")
+
+        flagged = 0
+        use_pool = len(pending) > 1 and (workers or 0) != 1 and (workers is not None or len(pending) >= POOL_MIN_CLASSES)
+        if not use_pool:
+            results = (_worker(path, cls, today) for cls in pending)
+            pool = None
+        else:
+            # spawn, not fork: the app process has threads (Streamlit, the connection pool)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            results = pool.map(_worker, [path] * len(pending), list(pending), [today] * len(pending))
+        try:
+            for done, (cls, flags) in enumerate(results, 1):
+                _save(conn, cls, pending[cls], flags, today)
+                flagged += len(flags)
+                if progress:
+                    progress(done, len(pending))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        bump("early_warnings", conn=conn)
+    return {"classes": len(pending), "skipped": total - len(pending), "flags": flagged}
+
+
+@cached("early_warnings")
+def load_warnings(conn, class_section=None):
+    """Flagged students with their rule, value and detail, most serious rules first."""
+    query = """
+        SELECT w.student_id, s.name AS "Name", s.roll_no AS "Roll No", w.class_section AS "Class/Section",
+               w.rule, w.value, w.detail AS "Detail", w.computed_at
+        FROM early_warnings w
+        JOIN students s ON s.id = w.student_id
+    """
+    params = []
+    if class_section is not None:
+        query += " WHERE w.class_section = ?"
+        params.append(class_section)
+    query += " ORDER BY w.class_section, s.roll_no, w.rule"
+    df = pd.read_sql(query, conn, params=params)
+    df.insert(4, "Warning", df["rule"].map(RULES))
+    return df
+
+
+@cached("early_warnings")
+def last_run(conn):
+    return conn.execute("SELECT MAX(finished_at) FROM early_warning_runs").fetchone()[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag students who need attention, across every class.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int,
+                        help=f"pool processes; 1 runs in this process (default: one per CPU from {POOL_MIN_CLASSES} classes)")
+    parser.add_argument("--full", action="store_true", help="re-analyse every class, changed or not")
+    args = parser.parse_args(argv)
+
+    result = run(args.db, args.workers, args.full)
+    print(f"Analysed {result['classes']} classes ({result['skipped']} unchanged), {result['flags']} flags.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+"""Headless reports and exports for the whole school, without Streamlit.
+
+    python export.py --out exports [--db students.db] [--format csv|xlsx|parquet]
+                     [--start 2024-06-01] [--end 2025-03-31] [--class 7A ...]
+                     [--per-student] [--ai] [--workers 4] [--restart]
+
+Writes, under --out:
+  classes.<fmt>                   one row per class (the overview's "All")
+  <class>/overview.<fmt>          per-student days, present and attendance %
+  <class>/attendance.<fmt>        every attendance record of the class
+  <class>/notes.<fmt>             every daily note and remark of the class
+  <class>/students/<roll>_<name>.<fmt>   the Reports page, per student (--per-student)
+  <class>/ai_summary.md           the AI Insights summary (--ai)
+
+The overview, class list and AI summary call the same functions as
+the pages; per-student reports come from one query per class. Classes are
+exported in a spawn process pool, one class per task; workers only read
+the database and each writes its own class directory. Record-level
+reports are read and written in chunks of CHUNK_ROWS rows, so memory
+stays flat however much history a class has.
+
+Every file is written as <name>.part and renamed when complete, and the
+parent records each finished class in manifest.json. Running the same
+command again after an interruption skips what is already done;
+--restart exports everything again. AI summaries are generated by the
+parent through the usual summary queue (and its cache), after the
+classes, and need a date range: it defaults to this month to date.
+
+Parquet needs pyarrow.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+import pandas as pd
+
+from ai_jobs import AI_MODEL, SummaryJobs
+from ai_prompt import build_class_context, build_prompt
+from archive import source
+from attendance_stats import attendance_summary, class_summary
+from db import DB_PATH, connect, get_pool
+from students import class_list, class_students
+
+
+FORMATS = ("csv", "xlsx", "parquet")
+CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575  # rows per sheet, after the header; longer reports continue on a new sheet
+MANIFEST = "manifest.json"
+
+_UNSAFE = re.compile(r"[^\w.-]+", re.UNICODE)
+
+
+def safe_name(text):
+    """A file/directory name for a class, roll number or student name."""
+    return _UNSAFE.sub("_", str(text)).strip("._") or "_"
+
+
+# ---------- CHUNKED WRITERS ----------
+# One writer per output file; write() takes one DataFrame chunk at a time.
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.book = Workbook(write_only=True)  # rows go straight to the file, not into memory
+        self.sheet = None
+        self.columns = None
+        self.rows = 0
+
+    def _new_sheet(self):
+        self.sheet = self.book.create_sheet(f"Sheet{len(self.book.worksheets) + 1}")
+        self.sheet.append(self.columns)
+        self.rows = 0
+
+    def write(self, df):
+        if self.sheet is None:
+            self.columns = [str(c) for c in df.columns]
+            self._new_sheet()
+        # NaN/None become empty cells; numpy scalars become plain Python values
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            if self.rows == XLSX_MAX_ROWS:
+                self._new_sheet()
+            self.sheet.append(row)
+            self.rows += 1
+
+    def close(self):
+        self.book.save(self.path)
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.writer = None
+
+    def write(self, df):
+        if self.writer is None:
+            table = self.pa.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Later chunks follow the first chunk's schema (an all-empty column would infer as null)
+            table = self.pa.Table.from_pandas(df, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "xlsx": XlsxWriter, "parquet": ParquetWriter}
+
+
+def write_report(path, fmt, chunks):
+    """Write DataFrame chunks to `path` via a .part file; return the number of rows."""
+    part = path + ".part"
+    writer = WRITERS[fmt](part)
+    rows = 0
+    try:
+        for df in chunks:
+            writer.write(df)
+            rows += len(df)
+    finally:
+        writer.close()
+    os.replace(part, path)
+    return rows
+
+
+# ---------- REPORTS ----------
+
+def _sources(conn, start, end):
+    # Table names for the queries below; archived years are attached when the range needs them
+    return {table: source(conn, table, start, end) for table in ("attendance", "student_remarks", "activities")}
+
+
+def _class_records(conn, class_section, start, end, query):
+    """Stream one of the record queries for a class, CHUNK_ROWS at a time."""
+    query = query.format(**_sources(conn, start, end))
+    params = [class_section]
+    if start is not None:
+        query += " AND t.date >= ?"
+        params.append(start)
+    if end is not None:
+        query += " AND t.date <= ?"
+        params.append(end)
+    query += " ORDER BY s.roll_no, s.name, t.date"
+    chunks = pd.read_sql(query, conn, params=params, chunksize=CHUNK_ROWS)
+    # An empty result yields no chunks; still write a file with just the header
+    first = next(chunks, None)
+    if first is None:
+        return [pd.read_sql(query + " LIMIT 0", conn, params=params)]
+    return _prepend(first, chunks)
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+ATTENDANCE_SQL = """
+    SELECT s.roll_no AS "Roll No", s.name AS "Name", t.date AS "Date", t.status AS "Status"
+    FROM {attendance} t
+    JOIN students s ON s.id = t.student_id
+    WHERE s.class_section = ?
+"""
+
+NOTES_SQL = """
+    SELECT s.roll_no AS "Roll No", s.name AS "Name", t.date AS "Date", t.kind AS "Type", t.text AS "Text"
+    FROM (SELECT student_id, date, 'Note' AS kind, note AS text FROM {activities}
+          UNION ALL
+          SELECT student_id, date, 'Remark', remark FROM {student_remarks}) t
+    JOIN students s ON s.id = t.student_id
+    WHERE s.class_section = ?
+"""
+
+
+# The Reports page (attendance and daily notes) for every student of a
+# class from one query, one row per student per date, ordered by student
+# so each student's rows can be cut out of the stream as it goes
+STUDENT_SQL = """
+    SELECT t.student_id, t.date AS "Date", MAX(t.status) AS "Status", group_concat(t.note, ' | ') AS "Notes"
+    FROM (SELECT student_id, date, status, NULL AS note FROM {attendance}
+          UNION ALL
+          SELECT student_id, date, NULL, note FROM {activities}) t
+    WHERE t.student_id IN (SELECT id FROM students WHERE class_section = ?)
+"""
+
+
+def student_reports(conn, class_section, start, end):
+    """Yield (student_id, DataFrame) per student with records, reading CHUNK_ROWS rows at a time."""
+    query, params = STUDENT_SQL.format(**_sources(conn, start, end)), [class_section]
+    if start is not None:
+        query += " AND t.date >= ?"
+        params.append(start)
+    if end is not None:
+        query += " AND t.date <= ?"
+        params.append(end)
+    query += " GROUP BY t.student_id, t.date ORDER BY t.student_id, t.date"
+    carry = None
+    for chunk in pd.read_sql(query, conn, params=params, chunksize=CHUNK_ROWS):
+        if chunk.empty:
+            continue
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        # The last student may continue in the next chunk
+        last = chunk["student_id"].iloc[-1]
+        carry = chunk[chunk["student_id"] == last]
+        for sid, rows in chunk[chunk["student_id"] != last].groupby("student_id", sort=False):
+            yield sid, rows.drop(columns=["student_id"])
+    if carry is not None:
+        yield last, carry.drop(columns=["student_id"])
+
+
+def _write_student(folder, fmt, student, report):
+    name = f"{safe_name(student['roll_no'])}_{safe_name(student['name'])}.{fmt}"
+    return write_report(os.path.join(folder, name), fmt, [report])
+
+
+def export_class(path, out, class_section, fmt, start, end, per_student):
+    """Write every report of one class; return (class_section, {report: rows})."""
+    conn = connect(path)
+    try:
+        folder = os.path.join(out, safe_name(class_section or "unassigned"))
+        os.makedirs(folder, exist_ok=True)
+        rows = {}
+
+        overview = attendance_summary(conn, class_section, start, end).drop(columns=["student_id"])
+        rows["overview"] = write_report(os.path.join(folder, f"overview.{fmt}"), fmt, [overview])
+        rows["attendance"] = write_report(os.path.join(folder, f"attendance.{fmt}"), fmt,
+                                          _class_records(conn, class_section, start, end, ATTENDANCE_SQL))
+        rows["notes"] = write_report(os.path.join(folder, f"notes.{fmt}"), fmt,
+                                     _class_records(conn, class_section, start, end, NOTES_SQL))
+
+        if per_student:
+            students_dir = os.path.join(folder, "students")
+            os.makedirs(students_dir, exist_ok=True)
+            roster = class_students(conn, class_section).set_index("id")
+            empty = pd.DataFrame({"Date": pd.Series(dtype=str), "Status": pd.Series(dtype=str),
+                                  "Notes": pd.Series(dtype=str)})
+            reports = dict.fromkeys(roster.index)
+            for sid, report in student_reports(conn, class_section, start, end):
+                reports[sid] = _write_student(students_dir, fmt, roster.loc[sid], report)
+            for sid, written in reports.items():
+                if written is None:  # nothing recorded for this student in the range
+                    _write_student(students_dir, fmt, roster.loc[sid], empty)
+            rows["students"] = len(roster)
+        return class_section, rows
+    finally:
+        conn.close()
+
+
+def ai_summary(jobs, conn, class_section, start, end):
+    """Generate (or fetch from the summary cache) the AI Insights text for a class."""
+    summary_text, _ = build_class_context(conn, class_section, start, end)
+    job = jobs.submit(AI_MODEL, build_prompt(summary_text))
+    job.wait()
+    if job.error:
+        raise job.error
+    return job.text
+
+
+# ---------- MANIFEST ----------
+# Which tasks have finished, for the parameters they were run with. Only
+# the parent process writes it, after every finished task.
+
+def load_manifest(out, params, restart=False):
+    path = os.path.join(out, MANIFEST)
+    if restart or not os.path.exists(path):
+        return {"params": params, "done": {}}
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("params") != params:
+        raise SystemExit(f"{path} was written with different options ({manifest.get('params')}). "
+                         "Use --restart to export again, or another --out directory.")
+    return manifest
+
+
+def save_manifest(out, manifest):
+    path = os.path.join(out, MANIFEST)
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".part", path)
+
+
+def _finish(out, manifest, task, **info):
+    manifest["done"][task] = dict(info, finished_at=datetime.now().isoformat(timespec="seconds"))
+    save_manifest(out, manifest)
+
+
+def run(path, out, fmt="csv", start=None, end=None, classes=None, per_student=False, ai=False,
+        workers=None, restart=False, log=print):
+    """Export the school (or `classes`) to `out`; return {"done", "skipped", "failed"}."""
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+    os.makedirs(out, exist_ok=True)
+    start = str(start) if start is not None else None
+    end = str(end) if end is not None else None
+    params = {"db": os.path.abspath(path), "format": fmt, "start": start, "end": end,
+              "classes": sorted(classes) if classes else None, "per_student": per_student, "ai": ai}
+    manifest = load_manifest(out, params, restart)
+    done = manifest["done"]
+
+    with get_pool(path).connection() as conn:
+        school = class_list(conn)
+        selected = [c for c in school if c in classes] if classes else school
+        unknown = sorted(set(classes or []) - set(school))
+        if unknown:
+            log(f"Unknown classes skipped: {', '.join(unknown)}")
+        if "school" not in done and not classes:
+            summary = class_summary(attendance_summary(conn, None, start, end))
+            rows = write_report(os.path.join(out, f"classes.{fmt}"), fmt, [summary])
+            _finish(out, manifest, "school", rows=rows)
+
+    pending = [c for c in selected if f"class:{c}" not in done]
+    failed = []
+    if pending:
+        use_pool = len(pending) > 1 and workers != 1
+        pool = None
+        try:
+            if use_pool:
+                # spawn, not fork: safe whatever threads the parent has running
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                futures = {pool.submit(export_class, path, out, c, fmt, start, end, per_student): c for c in pending}
+                results = as_completed(futures)
+            else:
+                futures = None
+                results = pending
+            for n, item in enumerate(results, 1):
+                cls = futures[item] if futures else item
+                try:
+                    _, rows = item.result() if futures else export_class(path, out, cls, fmt, start, end, per_student)
+                except Exception as e:
+                    failed.append(cls)
+                    log(f"[{n}/{len(pending)}] {cls}: failed: {e}")
+                    continue
+                _finish(out, manifest, f"class:{cls}", rows=rows)
+                log(f"[{n}/{len(pending)}] {cls}: " + ", ".join(f"{k} {v:,}" for k, v in rows.items()))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+    if ai:
+        ai_start = start or str(date.today().replace(day=1))
+        ai_end = end or str(date.today())
+        jobs = SummaryJobs(path=path)
+        with get_pool(path).connection() as conn:
+            for cls in selected:
+                if f"ai:{cls}" in done or cls in failed:
+                    continue
+                try:
+                    text = ai_summary(jobs, conn, cls, ai_start, ai_end)
+                except Exception as e:
+                    failed.append(cls)
+                    log(f"{cls}: AI summary failed: {e}")
+                    continue
+                target = os.path.join(out, safe_name(cls or "unassigned"), "ai_summary.md")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target + ".part", "w", encoding="utf-8") as f:
+                    f.write(f"# {cls}: {ai_start} to {ai_end}\n\n{text.strip()}\n")
+                os.replace(target + ".part", target)
+                _finish(out, manifest, f"ai:{cls}")
+                log(f"{cls}: AI summary written")
+
+    return {"done": len(pending) - len(set(failed) & set(pending)), "skipped": len(selected) - len(pending),
+            "failed": sorted(set(failed))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export per-class and per-student reports for the whole school.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--out", required=True, help="output directory (also holds the resume manifest)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--start", type=date.fromisoformat, help="first date to include (default: all history)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last date to include (default: all history)")
+    parser.add_argument("--class", dest="classes", action="append", metavar="CLASS",
+                        help="export only this class (repeatable)")
+    parser.add_argument("--per-student", action="store_true", help="also write one report per student")
+    parser.add_argument("--ai", action="store_true", help="also write an AI summary per class")
+    parser.add_argument("--workers", type=int, help="pool processes; 1 runs in this process (default: one per CPU)")
+    parser.add_argument("--restart", action="store_true", help="ignore the manifest and export everything again")
+    args = parser.parse_args(argv)
+
+    try:
+        result = run(args.db, args.out, args.format, args.start, args.end, args.classes,
+                     args.per_student, args.ai, args.workers, args.restart)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.")
+        return 130
+    print(f"Exported {result['done']} classes ({result['skipped']} already done).")
+    if result["failed"]:
+        print(f"Failed: {', '.join(result['failed'])}; run again to retry them.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import pandas as pd
+
+from cache import bump
+
+
+# ---------- STUDENT BULK IMPORT ----------
+# Reads CSV/XLSX in chunks, validates each chunk with vectorized pandas
+# operations and upserts it on (class_section, roll_no) with executemany.
+# The whole import is one transaction: either every accepted row lands
+# or none does.
+
+REQUIRED_COLUMNS = ["name", "roll_no", "class_section"]
+OPTIONAL_COLUMNS = ["father_name", "contact", "photo"]
+COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+KEY = ["class_section", "roll_no"]
+
+CHUNK_SIZE = 5000
+
+UPSERT_SQL = """
+    INSERT INTO students (name, roll_no, class_section, father_name, contact, photo)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(class_section, roll_no) DO UPDATE SET
+        name=excluded.name,
+        father_name=excluded.father_name,
+        contact=excluded.contact,
+        photo=excluded.photo
+"""
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    # Excel stores roll numbers typed as 12 as the float 12.0
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _read_csv_chunks(file, chunksize):
+    yield from pd.read_csv(file, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+
+def _read_xlsx_chunks(file, chunksize):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_cell_text(h) for h in next(rows, ())]
+        batch = []
+        for row in rows:
+            batch.append([_cell_text(v) for v in row])
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        wb.close()
+
+
+def read_chunks(file, filename, chunksize=CHUNK_SIZE):
+    """Yield the uploaded file as DataFrames of at most `chunksize` rows, all text."""
+    if filename.lower().endswith(".csv"):
+        return _read_csv_chunks(file, chunksize)
+    return _read_xlsx_chunks(file, chunksize)
+
+
+def read_preview(file, filename, rows=5):
+    df = next(iter(read_chunks(file, filename, chunksize=rows)), pd.DataFrame())
+    file.seek(0)
+    return df
+
+
+def missing_columns(columns):
+    present = {str(col).strip().lower() for col in columns}
+    return [col for col in REQUIRED_COLUMNS if col not in present]
+
+
+def normalize_chunk(df, first_row):
+    """Return (accepted, rejected) for one chunk.
+
+    `first_row` is the spreadsheet row number of the chunk's first data
+    row, so rejections can point at the line the teacher needs to fix.
+    """
+    df = df.rename(columns=lambda col: str(col).strip().lower())
+    df = df.loc[:, ~df.columns.duplicated()]
+    for col in COLUMNS:
+        if col not in df:
+            df[col] = ""
+    df = df[COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+    df.insert(0, "row", range(first_row, first_row + len(df)))
+
+    blank = df[REQUIRED_COLUMNS] == ""
+    bad = blank.any(axis=1)
+    reasons = blank[bad].apply(
+        lambda r: "missing " + ", ".join(col for col in REQUIRED_COLUMNS if r[col]), axis=1
+    )
+    rejected = pd.DataFrame({"row": df.loc[bad, "row"], "reason": reasons})
+
+    # The same student listed twice in one chunk: the last line wins
+    accepted = df[~bad].drop_duplicates(subset=KEY, keep="last")
+    return accepted, rejected
+
+
+def _existing(conn, accepted):
+    classes = accepted["class_section"].unique().tolist()
+    placeholders = ",".join("?" * len(classes))
+    return pd.read_sql(
+        f"SELECT {', '.join(COLUMNS)} FROM students WHERE class_section IN ({placeholders})",
+        conn, params=classes,
+    )
+
+
+def diff_chunk(conn, accepted, staged=None):
+    """Split accepted rows into new, changed and unchanged against the database.
+
+    `staged` holds rows a dry run would already have written in earlier
+    chunks; they take the place of the database's copy, as they would in
+    a real import.
+    """
+    if accepted.empty:
+        return accepted, accepted, accepted
+
+    existing = _existing(conn, accepted)
+    if staged is not None:
+        existing = pd.concat([staged, existing], ignore_index=True)
+    existing = existing.drop_duplicates(subset=KEY, keep="first")
+    merged = accepted.merge(existing, on=KEY, how="left", suffixes=("", "_db"), indicator=True)
+
+    is_new = merged["_merge"] == "left_only"
+    value_cols = [col for col in COLUMNS if col not in KEY]
+    same = pd.concat(
+        [merged[col] == merged[f"{col}_db"].fillna("") for col in value_cols], axis=1
+    ).all(axis=1)
+
+    new = accepted[is_new.to_numpy()]
+    changed = accepted[(~is_new & ~same).to_numpy()]
+    unchanged = accepted[(~is_new & same).to_numpy()]
+    return new, changed, unchanged
+
+
+def import_students(conn, file, filename, dry_run=False, chunksize=CHUNK_SIZE, progress=None):
+    """Import a roster file. Returns counts, the rejected rows and (dry run) the diff.
+
+    `progress`, if given, is called with the number of rows read so far
+    after every chunk.
+    """
+    result = {"read": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    rejected, new_rows, changed_rows = [], [], []
+    staged = pd.DataFrame(columns=COLUMNS)  # dry run: what earlier chunks would have written
+
+    c = conn.cursor()
+    if not dry_run:
+        c.execute("BEGIN IMMEDIATE")
+    try:
+        first_row = 2  # row 1 is the header
+        for chunk in read_chunks(file, filename, chunksize):
+            if result["read"] == 0:
+                missing = missing_columns(chunk.columns)
+                if missing:
+                    raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+            accepted, bad = normalize_chunk(chunk, first_row)
+            first_row += len(chunk)
+            result["read"] += len(chunk)
+            rejected.append(bad)
+
+            new, changed, unchanged = diff_chunk(conn, accepted, staged if dry_run else None)
+            result["inserted"] += len(new)
+            result["updated"] += len(changed)
+            result["unchanged"] += len(unchanged)
+
+            if dry_run:
+                new_rows.append(new)
+                changed_rows.append(changed)
+                staged = pd.concat([new, changed, staged])[COLUMNS].drop_duplicates(subset=KEY, keep="first")
+            else:
+                to_write = pd.concat([new, changed])[COLUMNS]
+                c.executemany(UPSERT_SQL, to_write.itertuples(index=False, name=None))
+
+            if progress:
+                progress(result["read"])
+
+        if not dry_run:
+            c.execute("COMMIT")
+            bump("students", conn=conn)
+    except Exception:
+        if not dry_run:
+            c.execute("ROLLBACK")
+        raise
+
+    result["rejected"] = pd.concat(rejected, ignore_index=True) if rejected else pd.DataFrame(columns=["row", "reason"])
+    if dry_run:
+        result["new"] = pd.concat(new_rows, ignore_index=True) if new_rows else pd.DataFrame(columns=["row"] + COLUMNS)
+        result["changed"] = pd.concat(changed_rows, ignore_index=True) if changed_rows else pd.DataFrame(columns=["row"] + COLUMNS)
+    return result
@@ -0,0 +1,116 @@
+"""Simulate N teachers saving attendance at the same time.
+
+    python loadtest.py --teachers 20 --rounds 10
+
+Each teacher owns one class and, per round, loads the attendance grid
+and saves a day. The run is done twice against a scratch database:
+once through a single shared connection (how the app used to work) and
+once through the WAL connection pool, and the throughput is compared.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from attendance import changed_cells, date_columns, load_attendance_grid, save_attendance
+from cache import clear_all
+from db import ConnectionPool
+from migrations import migrate
+
+
+def make_database(path, teachers, class_size):
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    with conn:
+        conn.executemany(
+            "INSERT INTO students (name, roll_no, class_section) VALUES (?, ?, ?)",
+            [(f"Student {t}-{r}", str(r), f"Class {t}") for t in range(teachers) for r in range(class_size)],
+        )
+    conn.close()
+
+
+def teacher(get_conn, class_section, rounds, latencies, errors):
+    start_day = date(2024, 1, 1)
+    for i in range(rounds):
+        d = str(start_day + timedelta(days=i))
+        dates = date_columns(d, d)
+        t0 = time.perf_counter()
+        try:
+            with get_conn() as conn:
+                grid, recorded = load_attendance_grid(conn, class_section, dates)
+                edited = grid.copy()
+                edited[d] = [random.random() > 0.1 for _ in range(len(edited))]
+                save_attendance(conn, changed_cells(grid, edited, recorded, dates))
+        except sqlite3.Error as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - t0)
+
+
+def run(get_conn, teachers, rounds):
+    clear_all()  # measure the database, not the query cache
+    latencies, errors = [], []
+    threads = [
+        threading.Thread(target=teacher, args=(get_conn, f"Class {t}", rounds, latencies, errors))
+        for t in range(teachers)
+    ]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        "saves": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "saves_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def shared_connection(path):
+    # The old setup: one connection for everyone. A lock is the only way
+    # to use it from several threads without corrupting cursor state.
+    conn = sqlite3.connect(path, check_same_thread=False)
+    lock = threading.Lock()
+
+    class _Shared:
+        def __enter__(self):
+            lock.acquire()
+            return conn
+
+        def __exit__(self, *exc):
+            lock.release()
+
+    return _Shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teachers", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--class-size", type=int, default=40)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("shared connection", "WAL pool"):
+            path = os.path.join(tmp, f"{label.replace(' ', '_')}.db")
+            make_database(path, args.teachers, args.class_size)
+            if label == "WAL pool":
+                pool = ConnectionPool(path, size=args.pool_size)
+                get_conn = pool.connection
+            else:
+                get_conn = shared_connection(path)
+            print(f"{label:>18}: {run(get_conn, args.teachers, args.rounds)}")
+
+
+if __name__ == "__main__":
+    main()
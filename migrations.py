@@ -0,0 +1,404 @@
+import bitmaps
+import rollups
+import search
+
+
+# ---------- SCHEMA MIGRATIONS ----------
+# Each migration runs once, in order, inside its own transaction.
+# The applied version is stored in SQLite's PRAGMA user_version, so
+# existing students.db files are upgraded in place on the next start.
+
+def _v1_base_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS students
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT, roll_no TEXT, class_section TEXT,
+                  father_name TEXT, contact TEXT, photo TEXT)''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS student_remarks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER,
+                    date TEXT,
+                    remark TEXT,
+                    FOREIGN KEY(student_id) REFERENCES students(id)
+                )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  student_id INTEGER, date TEXT, status TEXT,
+                  FOREIGN KEY(student_id) REFERENCES students(id))''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS activities
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  student_id INTEGER, date TEXT, note TEXT,
+                  FOREIGN KEY(student_id) REFERENCES students(id))''')
+
+
+def _v2_dedupe_and_unique(c):
+    # Older versions saved attendance/remarks with DELETE-then-INSERT and
+    # could leave several rows for one student and day. Keep the latest.
+    c.execute("""
+        DELETE FROM attendance WHERE id NOT IN (
+            SELECT MAX(id) FROM attendance GROUP BY student_id, date
+        )
+    """)
+    c.execute("""
+        DELETE FROM student_remarks WHERE id NOT IN (
+            SELECT MAX(id) FROM student_remarks GROUP BY student_id, date
+        )
+    """)
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_student_date ON attendance(student_id, date)")
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_remarks_student_date ON student_remarks(student_id, date)")
+
+
+def _v3_indexes(c):
+    # The app always compares stripped class names, store them that way
+    # so the class_section index can be used with a plain equality.
+    c.execute("UPDATE students SET class_section=TRIM(class_section) WHERE class_section != TRIM(class_section)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_students_class_section ON students(class_section)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_attendance_date ON attendance(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_remarks_date ON student_remarks(date)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_activities_student_date ON activities(student_id, date)")
+    c.execute("CREATE INDEX IF NOT EXISTS ix_activities_date ON activities(date)")
+
+
+def _v4_student_natural_key(c):
+    # Re-uploading a roster used to insert every student again. Merge each
+    # copy of a student (same class, roll no, name and father's name) into
+    # its oldest row, moving history across, then make (class_section,
+    # roll_no) unique so imports can upsert on it.
+    c.execute("UPDATE students SET roll_no=TRIM(roll_no) WHERE roll_no != TRIM(roll_no)")
+    same_person = "class_section, roll_no, LOWER(TRIM(COALESCE(name, ''))), LOWER(TRIM(COALESCE(father_name, '')))"
+    # NULL class or roll numbers are left alone, as the unique index allows them
+    c.execute(f"""
+        CREATE TEMP TABLE student_merge AS
+        SELECT old_id, keep_id FROM (
+            SELECT id AS old_id, MIN(id) OVER (PARTITION BY {same_person}) AS keep_id
+            FROM students
+            WHERE class_section IS NOT NULL AND roll_no IS NOT NULL)
+        WHERE old_id != keep_id
+    """)
+    for table in ("attendance", "student_remarks", "activities"):
+        c.execute(f"""
+            UPDATE OR IGNORE {table}
+            SET student_id = (SELECT keep_id FROM student_merge WHERE old_id = {table}.student_id)
+            WHERE student_id IN (SELECT old_id FROM student_merge)
+        """)
+        # Rows left behind clashed with a record the kept copy already has
+        c.execute(f"DELETE FROM {table} WHERE student_id IN (SELECT old_id FROM student_merge)")
+    c.execute("DELETE FROM students WHERE id IN (SELECT old_id FROM student_merge)")
+    c.execute("DROP TABLE student_merge")
+
+    # Different students sharing a roll number: which one keeps it is for
+    # the school to decide, so stop here and say which rows clash
+    clashes = c.execute("""
+        SELECT s.id, s.name, s.class_section, s.roll_no
+        FROM students s
+        JOIN (SELECT class_section, roll_no FROM students
+              WHERE class_section IS NOT NULL AND roll_no IS NOT NULL
+              GROUP BY class_section, roll_no HAVING COUNT(*) > 1) d
+          ON s.class_section = d.class_section AND s.roll_no = d.roll_no
+        ORDER BY s.class_section, s.roll_no, s.id
+    """).fetchall()
+    if clashes:
+        listing = "\n".join(f"  id {sid}: {name!r}, class {cls!r}, roll no {roll!r}" for sid, name, cls, roll in clashes)
+        raise RuntimeError(
+            f"{len(clashes)} students share a class and roll number with a different student. "
+            f"Give each a unique roll number (or remove the duplicate), then restart:\n{listing}"
+        )
+    c.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_students_class_roll ON students(class_section, roll_no)")
+
+
+def _v5_ai_summaries(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS ai_summaries
+                 (key TEXT PRIMARY KEY,
+                  model TEXT, summary TEXT, created_at TEXT)''')
+
+
+# Statements shared by the rollup triggers (v6, v11, v14). {sign} is +1 or -1, {row} is NEW or OLD.
+# ON CONFLICT DO NOTHING rather than INSERT OR IGNORE: an OR clause inside
+# a trigger is overridden by the outer statement's (ABORT for an upsert).
+# Rows without a student or date are not counted: the rollup keys cannot be NULL.
+def _rollup_add_row(row, sign):
+    return f"""
+        INSERT INTO attendance_monthly (student_id, month) SELECT {row}.student_id, substr({row}.date, 1, 7)
+            WHERE {row}.student_id IS NOT NULL AND {row}.date IS NOT NULL
+            ON CONFLICT DO NOTHING;
+        UPDATE attendance_monthly
+           SET days = days + ({sign}), present = present + ({sign}) * ({row}.status = 'Present')
+         WHERE student_id = {row}.student_id AND month = substr({row}.date, 1, 7);
+        INSERT INTO class_daily (class_section, date)
+            SELECT COALESCE(class_section, ''), {row}.date FROM students WHERE id = {row}.student_id AND {row}.date IS NOT NULL
+            ON CONFLICT DO NOTHING;
+        UPDATE class_daily
+           SET students_marked = students_marked + ({sign}), present = present + ({sign}) * ({row}.status = 'Present')
+         WHERE date = {row}.date
+           AND class_section = (SELECT COALESCE(class_section, '') FROM students WHERE id = {row}.student_id);
+    """
+
+
+def _rollup_move_student(row, sign):
+    # Add or remove all of one student's days from their class's daily totals
+    return f"""
+        INSERT INTO class_daily (class_section, date)
+            SELECT COALESCE({row}.class_section, ''), date FROM attendance WHERE student_id = {row}.id AND date IS NOT NULL
+            ON CONFLICT DO NOTHING;
+        UPDATE class_daily
+           SET students_marked = students_marked + ({sign}),
+               present = present + ({sign}) * (SELECT a.status = 'Present' FROM attendance a
+                                               WHERE a.student_id = {row}.id AND a.date = class_daily.date)
+         WHERE class_section = COALESCE({row}.class_section, '')
+           AND date IN (SELECT date FROM attendance WHERE student_id = {row}.id);
+    """
+
+
+def _v6_attendance_rollups(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance_monthly
+                 (student_id INTEGER, month TEXT,
+                  days INTEGER NOT NULL DEFAULT 0, present INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (student_id, month)) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS class_daily
+                 (class_section TEXT, date TEXT,
+                  students_marked INTEGER NOT NULL DEFAULT 0, present INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (class_section, date)) WITHOUT ROWID''')
+
+    cleanup = """
+        DELETE FROM attendance_monthly WHERE days <= 0;
+        DELETE FROM class_daily WHERE students_marked <= 0;
+    """
+
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_insert AFTER INSERT ON attendance BEGIN {_rollup_add_row('NEW', 1)} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_delete AFTER DELETE ON attendance BEGIN {_rollup_add_row('OLD', -1)} {cleanup} END")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_update
+                  AFTER UPDATE OF student_id, date, status ON attendance
+                  BEGIN {_rollup_add_row('OLD', -1)} {_rollup_add_row('NEW', 1)} {cleanup} END""")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_students_rollup_class
+                  AFTER UPDATE OF class_section ON students
+                  WHEN OLD.class_section IS NOT NEW.class_section
+                  BEGIN {_rollup_move_student('OLD', -1)} {_rollup_move_student('NEW', 1)} {cleanup} END""")
+
+    # Date-range edges of rollup queries read (date, student_id, status)
+    # straight from the index instead of visiting every table row
+    c.execute("CREATE INDEX IF NOT EXISTS ix_attendance_date_student_status ON attendance(date, student_id, status)")
+    c.execute("DROP INDEX IF EXISTS ix_attendance_date")
+
+    rollups.fill(c)
+
+
+def _v7_search(c):
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+                     name, roll_no, father_name,
+                     content='students', content_rowid='id',
+                     tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')""")
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                     body, student_id UNINDEXED, date UNINDEXED,
+                     tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')""")
+
+    index_student = "INSERT INTO students_fts (rowid, name, roll_no, father_name) VALUES (NEW.id, NEW.name, NEW.roll_no, NEW.father_name);"
+    # External-content rows are removed by replaying the old values
+    unindex_student = """INSERT INTO students_fts (students_fts, rowid, name, roll_no, father_name)
+                         VALUES ('delete', OLD.id, OLD.name, OLD.roll_no, OLD.father_name);"""
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_students_fts_insert AFTER INSERT ON students BEGIN {index_student} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_students_fts_delete AFTER DELETE ON students BEGIN {unindex_student} END")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_students_fts_update
+                  AFTER UPDATE OF id, name, roll_no, father_name ON students
+                  BEGIN {unindex_student} {index_student} END""")
+
+    # Notes get even rowids and remarks odd ones in the shared notes index
+    for table, column, offset in (("activities", "note", 0), ("student_remarks", "remark", 1)):
+        index_row = f"""INSERT INTO notes_fts (rowid, body, student_id, date)
+                        VALUES (NEW.id * 2 + {offset}, NEW.{column}, NEW.student_id, NEW.date);"""
+        unindex_row = f"DELETE FROM notes_fts WHERE rowid = OLD.id * 2 + {offset};"
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table} BEGIN {index_row} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table} BEGIN {unindex_row} END")
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update
+                      AFTER UPDATE OF id, student_id, date, {column} ON {table}
+                      BEGIN {unindex_row} {index_row} END""")
+
+    search.fill(c)
+
+
+def _v8_attendance_bitmaps(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS attendance_bitmaps
+                 (student_id INTEGER, month TEXT,
+                  marked INTEGER NOT NULL DEFAULT 0, present INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (student_id, month)) WITHOUT ROWID''')
+    # Filled and kept in step only once turned on (`bitmaps.py enable`)
+
+
+def _v9_early_warnings(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS early_warnings
+                 (student_id INTEGER, rule TEXT, class_section TEXT,
+                  value REAL, detail TEXT, computed_at TEXT,
+                  PRIMARY KEY (student_id, rule)) WITHOUT ROWID''')
+    c.execute("CREATE INDEX IF NOT EXISTS ix_early_warnings_class ON early_warnings(class_section)")
+
+    # A counter per class, raised by every write that can change the class's
+    # warnings; the job compares it with the value it last processed
+    c.execute('''CREATE TABLE IF NOT EXISTS class_revisions
+                 (class_section TEXT PRIMARY KEY, revision INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS early_warning_runs
+                 (class_section TEXT PRIMARY KEY, revision INTEGER, run_date TEXT, finished_at TEXT) WITHOUT ROWID''')
+
+    def touch(class_expr):
+        return f"""
+            INSERT INTO class_revisions (class_section, revision) SELECT COALESCE({class_expr}, ''), 1 WHERE 1
+                ON CONFLICT (class_section) DO UPDATE SET revision = revision + 1;
+        """
+
+    def touch_student(row):
+        return touch(f"(SELECT class_section FROM students WHERE id = {row}.student_id)")
+
+    for table in ("attendance", "student_remarks", "activities"):
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_insert AFTER INSERT ON {table} BEGIN {touch_student('NEW')} END")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_delete AFTER DELETE ON {table} BEGIN {touch_student('OLD')} END")
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_update AFTER UPDATE ON {table}
+                      BEGIN {touch_student('OLD')} {touch_student('NEW')} END""")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_students_revision_insert AFTER INSERT ON students BEGIN {touch('NEW.class_section')} END")
+    c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_students_revision_delete AFTER DELETE ON students BEGIN {touch('OLD.class_section')} END")
+    c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_students_revision_update AFTER UPDATE ON students
+                  BEGIN {touch('OLD.class_section')} {touch('NEW.class_section')} END""")
+
+
+def _v10_archives(c):
+    # Closed academic years moved out to per-year files (see archive.py)
+    c.execute('''CREATE TABLE IF NOT EXISTS archives
+                 (year TEXT PRIMARY KEY, start_date TEXT, end_date TEXT, path TEXT,
+                  attendance_rows INTEGER, remark_rows INTEGER, note_rows INTEGER, archived_at TEXT)''')
+
+    # Archived dates are read-only: a write there would sit next to the archived copy
+    for table in ("attendance", "student_remarks", "activities"):
+        for event in ("INSERT", "UPDATE"):
+            c.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_archived_{event.lower()} BEFORE {event} ON {table}
+                          WHEN NEW.date <= (SELECT MAX(end_date) FROM archives)
+                          BEGIN SELECT RAISE(ABORT, 'date is in an archived academic year'); END""")
+
+    # Deleting a student removes everything recorded about them. BEFORE, so
+    # the rollup and revision triggers on those tables still find the class
+    c.execute("""CREATE TRIGGER IF NOT EXISTS trg_students_delete_cascade BEFORE DELETE ON students
+                 BEGIN
+                     DELETE FROM attendance WHERE student_id = OLD.id;
+                     DELETE FROM activities WHERE student_id = OLD.id;
+                     DELETE FROM student_remarks WHERE student_id = OLD.id;
+                     DELETE FROM early_warnings WHERE student_id = OLD.id;
+                 END""")
+    # Rows left behind by deletes before the cascade existed
+    _delete_orphans(c)
+
+
+def _delete_orphans(c):
+    # NOT EXISTS rather than NOT IN: rows with a NULL student_id match neither
+    for table in ("attendance", "activities", "student_remarks", "early_warnings"):
+        c.execute(f"DELETE FROM {table} WHERE NOT EXISTS (SELECT 1 FROM students WHERE id = {table}.student_id)")
+
+
+def _v11_rollup_cleanup(c):
+    # The v6 triggers swept both rollup tables for emptied rows after every
+    # attendance delete/update (a full scan per row, seconds for a bulk
+    # student delete); only the key the row belonged to can have emptied
+    cleanup = """
+        DELETE FROM attendance_monthly
+         WHERE student_id = OLD.student_id AND month = substr(OLD.date, 1, 7) AND days <= 0;
+        DELETE FROM class_daily
+         WHERE date = OLD.date AND students_marked <= 0
+           AND class_section = (SELECT COALESCE(class_section, '') FROM students WHERE id = OLD.student_id);
+    """
+    class_cleanup = "DELETE FROM class_daily WHERE class_section = COALESCE(OLD.class_section, '') AND students_marked <= 0;"
+
+    for name in ("trg_attendance_rollup_delete", "trg_attendance_rollup_update", "trg_students_rollup_class"):
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    c.execute(f"CREATE TRIGGER trg_attendance_rollup_delete AFTER DELETE ON attendance BEGIN {_rollup_add_row('OLD', -1)} {cleanup} END")
+    c.execute(f"""CREATE TRIGGER trg_attendance_rollup_update
+                  AFTER UPDATE OF student_id, date, status ON attendance
+                  BEGIN {_rollup_add_row('OLD', -1)} {_rollup_add_row('NEW', 1)} {cleanup} END""")
+    c.execute(f"""CREATE TRIGGER trg_students_rollup_class
+                  AFTER UPDATE OF class_section ON students
+                  WHEN OLD.class_section IS NOT NEW.class_section
+                  BEGIN {_rollup_move_student('OLD', -1)} {_rollup_move_student('NEW', 1)} {class_cleanup} END""")
+
+
+def _v12_warning_class_moves(c):
+    # early_warnings is keyed by (student_id, rule) but each class's run
+    # only replaces its own class's rows: a student's warnings left under
+    # their old class made the new class's insert fail. They go with the move.
+    c.execute("""CREATE TRIGGER IF NOT EXISTS trg_students_warnings_class
+                 AFTER UPDATE OF class_section ON students
+                 WHEN OLD.class_section IS NOT NEW.class_section
+                 BEGIN DELETE FROM early_warnings WHERE student_id = NEW.id; END""")
+    c.execute("""DELETE FROM early_warnings
+                 WHERE class_section IS NOT (SELECT COALESCE(class_section, '') FROM students WHERE id = early_warnings.student_id)""")
+
+
+def _v13_null_student_orphans(c):
+    # v10's orphan cleanup used NOT IN, which keeps rows whose student_id is NULL
+    _delete_orphans(c)
+
+
+def _v14_null_safe_triggers(c):
+    # An attendance row without a student or date made the rollup triggers
+    # insert a NULL key and fail; recreate them with the guarded SQL
+    # (the bitmap triggers are recreated by `bitmaps.py enable`, see v15)
+    c.execute("DROP TRIGGER IF EXISTS trg_attendance_rollup_insert")
+    c.execute(f"CREATE TRIGGER trg_attendance_rollup_insert AFTER INSERT ON attendance BEGIN {_rollup_add_row('NEW', 1)} END")
+    _v11_rollup_cleanup(c)
+
+
+def _v15_bitmaps_opt_in(c):
+    # The bitmaps doubled the cost of every attendance write for the sake of
+    # one reader that can build its masks from the rows; they are now
+    # optional (`bitmaps.py enable`), and off until turned on
+    bitmaps.drop_triggers(c)
+    c.execute("DELETE FROM attendance_bitmaps")
+
+
+MIGRATIONS = [
+    (1, _v1_base_tables),
+    (2, _v2_dedupe_and_unique),
+    (3, _v3_indexes),
+    (4, _v4_student_natural_key),
+    (5, _v5_ai_summaries),
+    (6, _v6_attendance_rollups),
+    (7, _v7_search),
+    (8, _v8_attendance_bitmaps),
+    (9, _v9_early_warnings),
+    (10, _v10_archives),
+    (11, _v11_rollup_cleanup),
+    (12, _v12_warning_class_moves),
+    (13, _v13_null_student_orphans),
+    (14, _v14_null_safe_triggers),
+    (15, _v15_bitmaps_opt_in),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION. Returns the versions applied."""
+    current = schema_version(conn)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {current} is newer than this app supports ({SCHEMA_VERSION})."
+        )
+
+    applied = []
+    for version, step in MIGRATIONS:
+        if version <= current:
+            continue
+        c = conn.cursor()
+        try:
+            # IMMEDIATE so two processes starting at once cannot both apply it
+            c.execute("BEGIN IMMEDIATE")
+            if schema_version(conn) >= version:
+                c.execute("COMMIT")
+                continue
+            step(c)
+            c.execute(f"PRAGMA user_version={version}")
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        applied.append(version)
+    return applied
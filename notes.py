@@ -0,0 +1,27 @@
+import pandas as pd
+
+from archive import source
+from cache import bump, cached
+from db import retry_locked
+
+
+# ---------- DAILY NOTES ----------
+
+@retry_locked
+def add_note(conn, sid, note_date, note):
+    with conn:
+        conn.execute("INSERT INTO activities (student_id, date, note) VALUES (?, ?, ?)",
+                     (int(sid), str(note_date), note))
+    bump("activities", conn=conn)
+
+
+@cached("activities")
+def student_notes(conn, sid, start_date=None, end_date=None):
+    query, params = f"SELECT date, note FROM {source(conn, 'activities', start_date, end_date)} WHERE student_id=?", [int(sid)]
+    if start_date is not None:
+        query += " AND date >= ?"
+        params.append(str(start_date))
+    if end_date is not None:
+        query += " AND date <= ?"
+        params.append(str(end_date))
+    return pd.read_sql(query + " ORDER BY date", conn, params=params)
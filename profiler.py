@@ -0,0 +1,245 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# ---------- QUERY PROFILER ----------
+# Connections opened by db.connect() use ProfiledConnection, whose cursors
+# time every execute and fetch. While a Profile is active on the current
+# thread (one per Streamlit rerun, or one per `with profile():` block in a
+# test) each statement is recorded with its SQL, parameters, row count
+# and wall time (execute plus fetches). When the profile ends, statements
+# slower than SLOW_QUERY_MS are appended to the slow-query log (JSON lines)
+# together with their EXPLAIN QUERY PLAN. Parameters hold names, contacts
+# and remarks, so the log only keeps how many there were and their types
+# unless TRACKMYCLASS_SLOW_QUERY_LOG_PARAMS=1.
+
+SLOW_QUERY_MS = float(os.environ.get("TRACKMYCLASS_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("TRACKMYCLASS_SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_PARAMS = os.environ.get("TRACKMYCLASS_SLOW_QUERY_LOG_PARAMS", "") == "1"
+MAX_PARAMS_SHOWN = 5
+
+_active = threading.local()
+_log_lock = threading.Lock()
+_history_lock = threading.Lock()
+_page_history = defaultdict(lambda: {"runs": 0, "statements": 0, "db_ms": 0.0, "max_statements": 0})
+
+
+class StatementBudgetExceeded(AssertionError):
+    pass
+
+
+class Statement:
+    __slots__ = ("sql", "params", "rows", "ms", "_conn", "_raw_params")
+
+    def __init__(self, sql, params, conn=None, raw_params=None):
+        self.sql = " ".join(sql.split())
+        self.params = _short_params(params)
+        self.rows = 0
+        self.ms = 0.0
+        self._conn = conn
+        self._raw_params = raw_params
+
+    def as_dict(self):
+        return {"sql": self.sql, "params": self.params, "rows": self.rows, "ms": round(self.ms, 2)}
+
+
+class Profile:
+    def __init__(self, name=""):
+        self.name = name
+        self.statements = []
+        self.started = time.perf_counter()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_ms(self):
+        return sum(s.ms for s in self.statements)
+
+    def assert_max_statements(self, budget):
+        if self.count > budget:
+            listing = "\n".join(f"  {s.ms:8.2f} ms  {s.sql}" for s in self.statements)
+            raise StatementBudgetExceeded(
+                f"{self.name or 'block'} issued {self.count} statements, budget is {budget}:\n{listing}"
+            )
+
+    def summary(self):
+        return {"page": self.name, "statements": self.count, "db_ms": round(self.total_ms, 2),
+                "wall_ms": round((time.perf_counter() - self.started) * 1000, 2)}
+
+
+def current():
+    return getattr(_active, "profile", None)
+
+
+def start(name=""):
+    """Begin recording this thread's statements; replaces any unfinished profile."""
+    _active.profile = Profile(name)
+    return _active.profile
+
+
+def _record(p):
+    for stmt in p.statements:
+        if stmt.ms >= SLOW_QUERY_MS:
+            _log_slow(stmt, p.name)
+        stmt._conn = stmt._raw_params = None
+    if not p.name:
+        return
+    with _history_lock:
+        page = _page_history[p.name]
+        page["runs"] += 1
+        page["statements"] += p.count
+        page["db_ms"] += p.total_ms
+        page["max_statements"] = max(page["max_statements"], p.count)
+
+
+def finish():
+    """Stop recording, add the run to the per-page totals and return the Profile."""
+    p = current()
+    _active.profile = None
+    if p is not None:
+        _record(p)
+    return p
+
+
+@contextmanager
+def profile(name=""):
+    """Record the statements issued inside the block, e.g. to assert a budget:
+
+        with profile("overview") as p:
+            attendance_summary(conn, "5A")
+        p.assert_max_statements(2)
+    """
+    outer = current()
+    p = start(name)
+    try:
+        yield p
+    finally:
+        _active.profile = outer
+        _record(p)
+
+
+def page_history():
+    with _history_lock:
+        return [
+            {"page": name, "runs": h["runs"], "avg_statements": round(h["statements"] / h["runs"], 1),
+             "max_statements": h["max_statements"], "avg_db_ms": round(h["db_ms"] / h["runs"], 2)}
+            for name, h in sorted(_page_history.items())
+        ]
+
+
+def _short_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: str(v)[:40] for k, v in list(params.items())[:MAX_PARAMS_SHOWN]}
+    return [str(v)[:40] for v in list(params)[:MAX_PARAMS_SHOWN]]
+
+
+def _param_types(params):
+    """What the log keeps of a statement's parameters by default: how many, and of which types."""
+    values = params.values() if isinstance(params, dict) else list(params)
+    return {"count": len(values), "types": sorted({type(v).__name__ for v in values})}
+
+
+def _log_slow(stmt, page):
+    try:
+        # A plain cursor so the EXPLAIN itself is not profiled
+        plan_cursor = sqlite3.Cursor(stmt._conn)
+        if stmt._raw_params is None:
+            plan = plan_cursor.execute(f"EXPLAIN QUERY PLAN {stmt.sql}").fetchall()
+        else:
+            plan = plan_cursor.execute(f"EXPLAIN QUERY PLAN {stmt.sql}", stmt._raw_params).fetchall()
+        plan = [row[-1] for row in plan]
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        plan = [f"unavailable: {e}"]
+    entry = dict(stmt.as_dict(), plan=plan, time=datetime.now().isoformat(timespec="seconds"), page=page)
+    if not SLOW_QUERY_LOG_PARAMS and stmt._raw_params is not None:
+        entry["params"] = _param_types(stmt._raw_params)
+    with _log_lock:
+        with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    _stmt = None
+
+    def _track(self, started, rows=0):
+        stmt = self._stmt
+        if stmt is not None:
+            stmt.ms += (time.perf_counter() - started) * 1000
+            stmt.rows += rows
+
+    def _begin(self, sql, params, raw_params=None):
+        p = current()
+        if p is None:
+            self._stmt = None
+            return
+        self._stmt = Statement(sql, params, self.connection, raw_params)
+        p.statements.append(self._stmt)
+
+    def execute(self, sql, params=None):
+        self._begin(sql, params, params)
+        t0 = time.perf_counter()
+        result = super().execute(sql, params) if params is not None else super().execute(sql)
+        if self._stmt is not None and self.rowcount > 0:
+            self._stmt.rows = self.rowcount  # rows changed by INSERT/UPDATE/DELETE
+        self._track(t0)
+        return result
+
+    def executemany(self, sql, seq_of_params):
+        seq = seq_of_params if isinstance(seq_of_params, (list, tuple)) else list(seq_of_params)
+        self._begin(sql, [f"{len(seq)} parameter sets"])
+        t0 = time.perf_counter()
+        result = super().executemany(sql, seq)
+        if self._stmt is not None:
+            self._stmt.rows = max(self.rowcount, 0)
+        self._track(t0)
+        return result
+
+    def executescript(self, script):
+        self._begin(script, None)
+        t0 = time.perf_counter()
+        result = super().executescript(script)
+        self._track(t0)
+        return result
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._track(t0, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._track(t0, len(rows))
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._track(t0, len(rows))
+        return rows
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=None):
+        cur = self.cursor()
+        return cur.execute(sql, params) if params is not None else cur.execute(sql)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
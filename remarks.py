@@ -0,0 +1,69 @@
+import pandas as pd
+
+from archive import source
+from cache import bump, cached
+from db import retry_locked
+
+
+# ---------- REMARKS GRID ----------
+# All remarks for a class and date window come from one query and are
+# pivoted into a student x date text grid. Saving compares the edited
+# grid with the loaded snapshot and writes only the changed cells.
+
+UPSERT_SQL = """
+    INSERT INTO student_remarks (student_id, date, remark) VALUES (?, ?, ?)
+    ON CONFLICT(student_id, date) DO UPDATE SET remark=excluded.remark
+"""
+DELETE_SQL = "DELETE FROM student_remarks WHERE student_id=? AND date=?"
+
+
+@cached("students", "student_remarks")
+def load_remarks_grid(conn, class_section, dates):
+    """Student x date grid of remark text; `class_section=None` means all classes."""
+    query = f"""
+        SELECT s.id AS student_id, s.name AS "Name", s.roll_no AS "Roll No", r.date, r.remark
+        FROM students s
+        LEFT JOIN {source(conn, "student_remarks", dates[0], dates[-1])} r ON r.student_id = s.id AND r.date BETWEEN ? AND ?
+    """
+    params = [dates[0], dates[-1]]
+    if class_section is not None:
+        query += " WHERE s.class_section = ?"
+        params.append(class_section)
+    query += " ORDER BY s.id"
+
+    rows = pd.read_sql(query, conn, params=params)
+    roster = rows[["student_id", "Name", "Roll No"]].drop_duplicates("student_id").set_index("student_id")
+
+    written = rows.dropna(subset=["date"])
+    text = written.pivot(index="student_id", columns="date", values="remark")
+    text = text.reindex(index=roster.index, columns=dates).fillna("").astype(str)
+    return roster.join(text).reset_index()
+
+
+def changed_remarks(grid, edited, dates):
+    """Return (upserts, deletes) for cells whose text differs from the snapshot."""
+    before = grid.set_index("student_id")[dates]
+    after = edited.set_index("student_id")[dates].fillna("").astype(str).apply(lambda col: col.str.strip())
+
+    dirty = after.ne(before).stack()
+    cells = after.stack()[dirty]
+
+    upserts, deletes = [], []
+    for (sid, d), remark in cells.items():
+        if remark:
+            upserts.append((int(sid), d, remark))
+        else:
+            deletes.append((int(sid), d))
+    return upserts, deletes
+
+
+@retry_locked
+def save_remarks(conn, upserts, deletes):
+    """Write changed remarks in one transaction; cleared cells are deleted."""
+    with conn:
+        if upserts:
+            conn.executemany(UPSERT_SQL, upserts)
+        if deletes:
+            conn.executemany(DELETE_SQL, deletes)
+    bump("student_remarks", conn=conn)
+    return len(upserts) + len(deletes)
@@ -0,0 +1,111 @@
+"""Attendance rollup tables: rebuild or verify them.
+
+    python rollups.py verify [--db students.db]
+    python rollups.py rebuild [--db students.db]
+
+attendance_monthly holds days/present per student per month and
+class_daily holds students_marked/present per class per day. Triggers
+added in migration v6 keep both in step with every attendance write,
+inside the same transaction, so statistics can read them instead of
+scanning every attendance row. Class totals follow each student's
+current class, as the rest of the app does. Rows without a student or
+a date have no month or day to count under and are left out.
+
+Rows for archived academic years are kept when their attendance moves
+out (see archive.py), so rebuild and verify only cover the dates after
+the last archived year.
+"""
+import argparse
+import sys
+
+import pandas as pd
+
+from archive import archived_until
+
+
+MONTHLY_SQL = """
+    SELECT student_id, substr(date, 1, 7) AS month,
+           COUNT(*) AS days, SUM(status = 'Present') AS present
+    FROM attendance
+    WHERE student_id IS NOT NULL AND date IS NOT NULL
+    GROUP BY student_id, month
+"""
+
+CLASS_DAILY_SQL = """
+    SELECT COALESCE(s.class_section, '') AS class_section, a.date,
+           COUNT(*) AS students_marked, SUM(a.status = 'Present') AS present
+    FROM attendance a
+    JOIN students s ON s.id = a.student_id
+    WHERE a.date IS NOT NULL
+    GROUP BY s.class_section, a.date
+"""
+
+
+def fill(c, after=""):
+    """Recompute both rollups from the attendance table (caller owns the transaction).
+
+    Only months and days after `after` (the last archived date) are replaced.
+    """
+    c.execute("DELETE FROM attendance_monthly WHERE month > ?", (after,))
+    c.execute(f"INSERT INTO attendance_monthly (student_id, month, days, present) {MONTHLY_SQL}")
+    c.execute("DELETE FROM class_daily WHERE date > ?", (after,))
+    c.execute(f"INSERT INTO class_daily (class_section, date, students_marked, present) {CLASS_DAILY_SQL}")
+
+
+def rebuild(conn):
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        fill(c, archived_until(conn) or "")
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def verify(conn):
+    """Return the rollup rows that disagree with the attendance table (empty when in sync)."""
+    after = archived_until(conn) or ""
+    problems = []
+    for table, sql, key, values in (
+        ("attendance_monthly", MONTHLY_SQL, ["student_id", "month"], ["days", "present"]),
+        ("class_daily", CLASS_DAILY_SQL, ["class_section", "date"], ["students_marked", "present"]),
+    ):
+        expected = pd.read_sql(sql, conn)
+        stored = pd.read_sql(f"SELECT {', '.join(key + values)} FROM {table} WHERE {values[0]} > 0 AND {key[-1]} > ?",
+                             conn, params=(after,))
+        merged = expected.merge(stored, on=key, how="outer", suffixes=("_expected", "_stored")).fillna(0)
+        bad = pd.concat(
+            [merged[f"{v}_expected"] != merged[f"{v}_stored"] for v in values], axis=1
+        ).any(axis=1)
+        if bad.any():
+            rows = merged[bad].copy()
+            rows.insert(0, "table", table)
+            problems.append(rows)
+    return pd.concat(problems, ignore_index=True) if problems else pd.DataFrame()
+
+
+def main(argv=None):
+    from db import DB_PATH, get_pool
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the attendance rollup tables.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    with get_pool(args.db).connection() as conn:
+        if args.command == "rebuild":
+            rebuild(conn)
+            print("Rollups rebuilt.")
+            return 0
+        problems = verify(conn)
+    if problems.empty:
+        print("Rollups are in sync with attendance.")
+        return 0
+    print(f"{len(problems)} rollup rows out of sync:")
+    print(problems.to_string(index=False))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
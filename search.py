@@ -0,0 +1,144 @@
+"""Full-text search over students, daily notes and remarks (SQLite FTS5).
+
+    python search.py rebuild [--db students.db]
+
+students_fts indexes name, roll number and father's name, using the
+students table as its content (rowid = students.id). notes_fts holds the
+text of both activities and student_remarks, so one query ranks notes and
+remarks together; its rowid is activities.id * 2 or
+student_remarks.id * 2 + 1. Triggers added in migration v7 keep both
+indexes in step with every write. Notes and remarks of archived academic
+years (archive.py) leave the index with their rows.
+"""
+import argparse
+import re
+import sys
+
+import pandas as pd
+
+from cache import cached
+
+
+NOTE, REMARK = "Note", "Remark"
+RANK_LIMIT = 5000  # most matches that are scored for relevance
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def fill(c):
+    """Re-index every student, note and remark (caller owns the transaction)."""
+    c.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+    c.execute("DELETE FROM notes_fts")
+    c.execute("INSERT INTO notes_fts (rowid, body, student_id, date) SELECT id * 2, note, student_id, date FROM activities")
+    c.execute("INSERT INTO notes_fts (rowid, body, student_id, date) SELECT id * 2 + 1, remark, student_id, date FROM student_remarks")
+
+
+def rebuild(conn):
+    c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        fill(c)
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def match_query(text):
+    """Turn what a user typed into an FTS5 query: every word, as a prefix, must match.
+
+    Returns None when there is nothing to search for. Words are quoted, so
+    FTS5 syntax (AND, NEAR, column filters, quotes) in the input is inert.
+    """
+    tokens = _TOKEN.findall(str(text or ""))
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _student_match(text, class_section):
+    query = """
+        FROM students_fts f
+        JOIN students s ON s.id = f.rowid
+        WHERE students_fts MATCH ?
+    """
+    params = [match_query(text)]
+    if class_section is not None:
+        query += " AND s.class_section = ?"
+        params.append(class_section)
+    return query, params
+
+
+@cached("students")
+def search_students(conn, text, class_section=None, page=1, page_size=20):
+    """Students whose name, roll number or father's name start with the typed words, best match first."""
+    if match_query(text) is None:
+        return pd.DataFrame(columns=["id", "name", "roll_no", "class_section", "father_name"])
+    where, params = _student_match(text, class_section)
+    # A roll number hit ranks above a name hit, a name hit above the father's name
+    return pd.read_sql(
+        f"""SELECT s.id, s.name, s.roll_no, s.class_section, s.father_name {where}
+            ORDER BY bm25(students_fts, 5.0, 10.0, 1.0), s.class_section, s.roll_no
+            LIMIT ? OFFSET ?""",
+        conn, params=params + [page_size, (page - 1) * page_size],
+    )
+
+
+@cached("students")
+def count_student_matches(conn, text, class_section=None):
+    if match_query(text) is None:
+        return 0
+    where, params = _student_match(text, class_section)
+    return conn.execute(f"SELECT COUNT(*) {where}", params).fetchone()[0]
+
+
+@cached("students", "activities", "student_remarks")
+def search_notes(conn, text, page=1, page_size=20):
+    """Notes and remarks matching the typed words, with a highlighted snippet.
+
+    Results are ordered by relevance (bm25) when there are at most
+    RANK_LIMIT matches. Scoring costs time per match, so broader queries
+    come back newest entry first; the `ranked` column says which it was.
+    """
+    query = match_query(text)
+    if query is None:
+        return pd.DataFrame(columns=["student_id", "name", "roll_no", "class_section", "date", "kind", "snippet", "ranked"])
+    ranked = count_note_matches(conn, text) <= RANK_LIMIT
+    df = pd.read_sql(
+        f"""SELECT m.student_id, s.name, s.roll_no, s.class_section, m.date,
+                   CASE m.rowid % 2 WHEN 0 THEN '{NOTE}' ELSE '{REMARK}' END AS kind, m.snippet
+            FROM (SELECT rowid, student_id, date, snippet(notes_fts, 0, '**', '**', '…', 16) AS snippet
+                  FROM notes_fts WHERE notes_fts MATCH ?
+                  ORDER BY {"rank" if ranked else "rowid DESC"}
+                  LIMIT ? OFFSET ?) m
+            JOIN students s ON s.id = m.student_id""",
+        conn, params=(query, page_size, (page - 1) * page_size),
+    )
+    df["ranked"] = ranked
+    return df
+
+
+@cached("students", "activities", "student_remarks")
+def count_note_matches(conn, text):
+    query = match_query(text)
+    if query is None:
+        return 0
+    return conn.execute("SELECT COUNT(*) FROM notes_fts WHERE notes_fts MATCH ?", (query,)).fetchone()[0]
+
+
+def main(argv=None):
+    from db import DB_PATH, get_pool
+
+    parser = argparse.ArgumentParser(description="Rebuild the full-text search indexes.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args(argv)
+
+    with get_pool(args.db).connection() as conn:
+        rebuild(conn)
+    print("Search indexes rebuilt.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
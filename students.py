@@ -0,0 +1,165 @@
+import pandas as pd
+
+from archive import purge_students
+from cache import bump, cached
+from db import retry_locked
+from search import match_query
+
+
+# ---------- STUDENTS DATA ACCESS ----------
+
+STUDENT_COLUMNS = ["name", "roll_no", "class_section", "father_name", "contact", "photo"]
+REQUIRED_COLUMNS = ["name", "roll_no", "class_section"]
+
+
+@cached("students")
+def class_list(conn):
+    classes = pd.read_sql(
+        "SELECT DISTINCT class_section FROM students WHERE class_section IS NOT NULL ORDER BY class_section",
+        conn,
+    )
+    return classes["class_section"].map(str).str.strip().drop_duplicates().tolist()
+
+
+@cached("students")
+def class_students(conn, class_section):
+    return pd.read_sql("SELECT * FROM students WHERE class_section=?", conn, params=(class_section,))
+
+
+@cached("students")
+def count_students(conn, class_section=None):
+    if class_section is None:
+        return conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    return conn.execute("SELECT COUNT(*) FROM students WHERE class_section=?", (class_section,)).fetchone()[0]
+
+
+@cached("students")
+def roster_page(conn, class_section=None, page=1, page_size=25):
+    """One page of the roster (all classes when `class_section` is None), in id order."""
+    query = "SELECT * FROM students"
+    params = []
+    if class_section is not None:
+        query += " WHERE class_section=?"
+        params.append(class_section)
+    query += " ORDER BY id LIMIT ? OFFSET ?"
+    params += [page_size, (page - 1) * page_size]
+    return pd.read_sql(query, conn, params=params)
+
+
+def _roster_filter(class_section=None, name=None, roll_no=None):
+    """WHERE clause and params for the Manage Students filters.
+
+    Name and roll number match word prefixes through students_fts, so
+    neither filter scans the table.
+    """
+    clauses, params = ["1"], []
+    if class_section is not None:
+        clauses.append("class_section = ?")
+        params.append(class_section)
+    terms = [f"{column} : ({match_query(text)})" for column, text in (("name", name), ("roll_no", roll_no))
+             if match_query(text) is not None]
+    if terms:
+        clauses.append("id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)")
+        params.append(" AND ".join(terms))
+    return " AND ".join(clauses), params
+
+
+@cached("students")
+def roster_slice(conn, after_id=0, page_size=25, class_section=None, name=None, roll_no=None):
+    """Up to page_size + 1 filtered students with id > after_id, in id order.
+
+    Keyset pagination: the caller keeps the last id of each page, so a
+    page costs the same wherever it is in the roster. The extra row only
+    tells the caller there is a next page.
+    """
+    where, params = _roster_filter(class_section, name, roll_no)
+    return pd.read_sql(
+        f"SELECT id, {', '.join(STUDENT_COLUMNS)} FROM students WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+        conn, params=params + [int(after_id), page_size + 1],
+    )
+
+
+@cached("students")
+def count_roster(conn, class_section=None, name=None, roll_no=None):
+    where, params = _roster_filter(class_section, name, roll_no)
+    return conn.execute(f"SELECT COUNT(*) FROM students WHERE {where}", params).fetchone()[0]
+
+
+def changed_students(page, edited):
+    """Return (rows, refused) for the edited rows.
+
+    rows are (name, roll_no, class_section, father_name, contact, photo, id)
+    ready for update_students; refused describes each edited row left with
+    a blank name, roll no or class, which is not saved.
+    """
+    before = page.set_index("id")[STUDENT_COLUMNS].fillna("").astype(str)
+    after = edited.set_index("id")[STUDENT_COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+    dirty = after.ne(before.reindex(after.index)).any(axis=1)
+    blank = after[REQUIRED_COLUMNS] == ""
+    bad = dirty & blank.any(axis=1)
+
+    refused = [
+        f"{before.at[sid, 'name'] or 'id ' + str(sid)} (Roll No {before.at[sid, 'roll_no']}): "
+        f"missing {', '.join(col for col in REQUIRED_COLUMNS if blank.at[sid, col])}"
+        for sid in after.index[bad]
+    ]
+    good = dirty & ~bad
+    rows = [(*row, int(sid)) for sid, row in zip(after.index[good], after[good].itertuples(index=False, name=None))]
+    return rows, refused
+
+
+@retry_locked
+def add_student(conn, name, roll_no, class_section, father_name="", contact="", photo=""):
+    with conn:
+        conn.execute(
+            "INSERT INTO students (name, roll_no, class_section, father_name, contact, photo) VALUES (?, ?, ?, ?, ?, ?)",
+            (name.strip(), roll_no.strip(), class_section.strip(), father_name.strip(), contact.strip(), photo.strip()),
+        )
+    bump("students", conn=conn)
+
+
+@retry_locked
+def update_students(conn, rows):
+    """Apply (name, roll_no, class_section, father_name, contact, photo, id) rows in one transaction.
+
+    A duplicate roll number anywhere in the batch rolls back all of it.
+    """
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany(f"UPDATE students SET {', '.join(c + '=?' for c in STUDENT_COLUMNS)} WHERE id=?", rows)
+    # A class change moves attendance totals and drops warnings (v6, v12 triggers)
+    bump("students", "attendance", "early_warnings", conn=conn)
+    return len(rows)
+
+
+@retry_locked
+def move_students(conn, sids, class_section):
+    """Move a set of students to another class in one statement."""
+    ids = [int(sid) for sid in sids]
+    if not ids:
+        return 0
+    with conn:
+        conn.execute(f"UPDATE students SET class_section=? WHERE id IN ({', '.join('?' * len(ids))})",
+                     [class_section.strip()] + ids)
+    # Their warnings go with the move (v12 trigger) until the new class is analysed
+    bump("students", "attendance", "early_warnings", conn=conn)
+    return len(ids)
+
+
+@retry_locked
+def delete_students(conn, sids):
+    """Delete a set of students and everything recorded about them."""
+    ids = [int(sid) for sid in sids]
+    if not ids:
+        return 0
+    # Archived years are separate files, purged in the same transaction as the
+    # delete; attendance, notes, remarks and warnings go with the rows (v10 cascade)
+    purge_students(conn, ids, then=lambda c: c.execute(
+        f"DELETE FROM students WHERE id IN ({', '.join('?' * len(ids))})", ids))
+    bump("students", "attendance", "activities", "student_remarks", "early_warnings", conn=conn)
+    return len(ids)
+
+
+def delete_student(conn, sid):
+    return delete_students(conn, [sid])
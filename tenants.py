@@ -0,0 +1,341 @@
+"""Tenants: one database per school or campus.
+
+    python tenants.py list
+    python tenants.py add <slug> [--name "North Campus"] [--db tenants/<slug>.db] [--access-code CODE]
+    python tenants.py split --db students.db --map classes.csv [--out tenants] [--default <slug>]
+
+Schools are listed in a JSON registry (TRACKMYCLASS_TENANTS, default
+tenants.json), with database paths relative to the registry's folder:
+
+    {"north": {"name": "North Campus", "db": "tenants/north.db", "access_code": "..."}}
+
+Every school has its own SQLite file, and with it its own connection
+pool, query-cache partition (cache.py), AI job queue and archive folder,
+so one school's import or archiving run never waits on another's
+writes. The app picks the school from ?school=<slug> in the URL or from
+the sidebar, and asks once per session for its access_code if it has
+one. Without a registry the app serves TRACKMYCLASS_DB as before.
+
+`split` copies a combined database out into one shard per school. --map
+is a CSV with class_section and tenant columns; every class must be
+mapped (or --default names the school for the rest). A shard keeps its
+students with their ids, all their attendance, remarks and notes, their
+rollups, bitmaps and early warnings, the revisions of its classes, and
+its share of every archived year in archive files of its own. The
+shard's triggers are dropped while rows are copied and recreated
+afterwards, then the search index is rebuilt. AI summaries are not
+copied: they are cached per prompt and come back on demand. The source
+is only read, but it stays locked against writers while each shard is
+copied, so split with the app stopped. New shards are added to the
+registry.
+"""
+import argparse
+import hmac
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+
+import bitmaps
+import search
+from archive import ARCHIVE_DIR, INDEXES, STUDENT_CLASSES, TABLES, archived_years
+from db import DB_PATH, connect
+from migrations import migrate
+
+
+TENANTS_FILE = os.environ.get("TRACKMYCLASS_TENANTS", "tenants.json")
+SHARD_DIR = "tenants"  # where `split` writes shards, relative to the current folder
+SLUG = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+# Tables copied into a shard, by the students they belong to and by class
+BY_STUDENT = ["attendance", "student_remarks", "activities", "attendance_monthly", "attendance_bitmaps",
+              "early_warnings"]
+BY_CLASS = ["class_revisions", "early_warning_runs"]
+
+
+class Tenant:
+    __slots__ = ("slug", "name", "db", "access_code")
+
+    def __init__(self, slug, name, db, access_code=None):
+        self.slug = slug
+        self.name = name
+        self.db = db
+        self.access_code = access_code
+
+    def allows(self, code):
+        """Whether `code` opens this school (always, when it has no access code)."""
+        return not self.access_code or hmac.compare_digest(str(code or ""), self.access_code)
+
+
+# ---------- REGISTRY ----------
+
+_loaded = {}  # registry path -> (mtime, tenants)
+
+
+def load_tenants(path=TENANTS_FILE):
+    """slug -> Tenant in registry order; empty when there is no registry.
+
+    Re-read only when the file changes, so every rerun can call it.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return {}
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == mtime:
+        return loaded[1]
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    tenants = {}
+    for slug, entry in entries.items():
+        if not SLUG.match(slug):
+            raise ValueError(f"Tenant {slug!r} in {path}: use lower-case letters, digits, '-' and '_'.")
+        tenants[slug] = Tenant(slug, entry.get("name") or slug, os.path.join(base, entry["db"]),
+                               entry.get("access_code"))
+    _loaded[path] = (mtime, tenants)
+    return tenants
+
+
+def register(slug, db, name=None, access_code=None, path=TENANTS_FILE):
+    """Add a school to the registry, or update its entry; given fields replace stored ones."""
+    if not SLUG.match(slug):
+        raise ValueError(f"Tenant {slug!r}: use lower-case letters, digits, '-' and '_'.")
+    entries = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    entry = entries.setdefault(slug, {})
+    entry["name"] = name or entry.get("name") or slug
+    entry["db"] = os.path.relpath(os.path.abspath(db), base)
+    if access_code is not None:
+        entry["access_code"] = access_code
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(path + ".part", path)
+    return load_tenants(path)[slug]
+
+
+# ---------- SPLITTING A COMBINED DATABASE ----------
+
+def read_class_map(path):
+    """class_section -> tenant slug from a CSV with class_section and tenant columns."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = {"class_section", "tenant"} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path} needs the columns class_section and tenant (missing: {', '.join(sorted(missing))}).")
+    df = df.apply(lambda col: col.str.strip())
+    clashes = df.groupby("class_section")["tenant"].nunique()
+    if (clashes > 1).any():
+        raise ValueError(f"Classes mapped to more than one tenant: {', '.join(clashes[clashes > 1].index)}.")
+    bad = sorted(slug for slug in set(df["tenant"]) if not SLUG.match(slug))
+    if bad:
+        raise ValueError(f"Invalid tenant names: {', '.join(map(repr, bad))}.")
+    return dict(zip(df["class_section"], df["tenant"]))
+
+
+def _columns(c, schema, table):
+    return ", ".join(row[1] for row in c.execute(f"PRAGMA {schema}.table_info({table})"))
+
+
+def _copy_rows(c, slug, years):
+    """Copy one school's rows from `src` into the shard (caller owns the transaction)."""
+    # The rollups, bitmaps and revisions are copied as they are, so the
+    # per-row triggers must not run while their source rows go in
+    triggers = c.execute("SELECT name, sql FROM main.sqlite_master WHERE type = 'trigger'").fetchall()
+    for name, _ in triggers:
+        c.execute(f"DROP TRIGGER main.{name}")
+
+    columns = _columns(c, "main", "students")
+    c.execute(f"""INSERT INTO main.students ({columns}) SELECT {columns} FROM src.students
+                  WHERE COALESCE(class_section, '') IN (SELECT class_section FROM temp.shard_classes)""")
+    for table in BY_STUDENT:
+        columns = _columns(c, "main", table)
+        c.execute(f"""INSERT INTO main.{table} ({columns}) SELECT {columns} FROM src.{table}
+                      WHERE student_id IN (SELECT id FROM main.students)""")
+    for table in BY_CLASS:
+        columns = _columns(c, "main", table)
+        c.execute(f"""INSERT INTO main.{table} ({columns}) SELECT {columns} FROM src.{table}
+                      WHERE class_section IN (SELECT class_section FROM temp.shard_classes)""")
+    # Hot days only: archived days are counted under the class a student had
+    # when the year was archived, which may be another shard's, so each
+    # shard counts them again from the archived rows it gets (_split_year)
+    c.execute("""INSERT INTO main.class_daily (class_section, date, students_marked, present)
+                 SELECT class_section, date, students_marked, present FROM src.class_daily
+                 WHERE class_section IN (SELECT class_section FROM temp.shard_classes) AND date > ?""",
+              (max((end for _, _, end, _ in years), default=""),))
+    # Ids carry on from the combined database's, never reusing an archived row's
+    c.execute("DELETE FROM main.sqlite_sequence")
+    c.execute("INSERT INTO main.sqlite_sequence (name, seq) SELECT name, seq FROM src.sqlite_sequence")
+    # Archived years are registered now, with their row counts once copied
+    c.executemany("INSERT INTO main.archives (year, start_date, end_date, path, archived_at) "
+                  "SELECT year, start_date, end_date, ?, archived_at FROM src.archives WHERE year = ?",
+                  [(os.path.join(ARCHIVE_DIR, f"{slug}-{year}.db"), year) for year, _, _, _ in years])
+
+    for _, sql in triggers:
+        c.execute(sql)
+    # The bitmaps were copied as they are; keep them up to date if the source did
+    if bitmaps.enabled(c, "src"):
+        bitmaps.create_triggers(c)
+    search.fill(c)
+
+
+def _split_year(conn, source_archive, path):
+    """Write the shard's students' rows of one archived year to a fresh archive file,
+    and count their days into the shard's class_daily."""
+    for leftover in (path, path + "-journal"):  # from an interrupted split
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS src_year", (source_archive,))
+    conn.execute("ATTACH DATABASE ? AS shard_year", (path,))
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            for table, (ddl, columns) in TABLES.items():
+                c.execute(f"CREATE TABLE shard_year.{table} ({ddl})")
+                c.execute(f"INSERT INTO shard_year.{table} ({columns}) SELECT {columns} FROM src_year.{table} "
+                          f"WHERE student_id IN (SELECT id FROM main.students) ORDER BY id")
+            c.execute(f"CREATE TABLE shard_year.student_classes ({STUDENT_CLASSES})")
+            if c.execute("SELECT 1 FROM src_year.sqlite_master WHERE name = 'student_classes'").fetchone():
+                c.execute("""INSERT INTO shard_year.student_classes SELECT student_id, class_section
+                             FROM src_year.student_classes WHERE student_id IN (SELECT id FROM main.students)""")
+            else:
+                # Archived before classes were recorded: the current class is the best guess
+                c.execute("""INSERT INTO shard_year.student_classes SELECT id, COALESCE(class_section, '')
+                             FROM main.students WHERE id IN (SELECT student_id FROM shard_year.attendance)""")
+            for index in INDEXES:
+                c.execute(index.format(schema="shard_year"))
+            c.execute("""INSERT INTO main.class_daily (class_section, date, students_marked, present)
+                         SELECT k.class_section, a.date, COUNT(*), SUM(a.status = 'Present')
+                         FROM shard_year.attendance a JOIN shard_year.student_classes k USING (student_id)
+                         GROUP BY k.class_section, a.date""")
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        return {table: conn.execute(f"SELECT COUNT(*) FROM shard_year.{table}").fetchone()[0] for table in TABLES}
+    finally:
+        conn.execute("DETACH DATABASE src_year")
+        conn.execute("DETACH DATABASE shard_year")
+
+
+def _make_shard(source, years, slug, classes, path):
+    part = path + ".part"
+    for leftover in (part, part + "-wal", part + "-shm", part + "-journal"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    conn = connect(part)
+    try:
+        migrate(conn)
+        conn.execute("ATTACH DATABASE ? AS src", (source,))
+        conn.execute("CREATE TEMP TABLE shard_classes (class_section TEXT PRIMARY KEY)")
+        with conn:
+            conn.executemany("INSERT INTO temp.shard_classes VALUES (?)", [(cls,) for cls in classes])
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            _copy_rows(c, slug, years)
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+
+        source_dir = os.path.dirname(os.path.abspath(source))
+        for year, _, _, relative in years:
+            copied = _split_year(conn, os.path.join(source_dir, relative),
+                                 os.path.join(os.path.dirname(os.path.abspath(path)), ARCHIVE_DIR, f"{slug}-{year}.db"))
+            with conn:
+                conn.execute("UPDATE archives SET attendance_rows = ?, remark_rows = ?, note_rows = ? WHERE year = ?",
+                             (copied["attendance"], copied["student_remarks"], copied["activities"], year))
+        conn.execute("DETACH DATABASE src")
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ("students", *TABLES)}
+    finally:
+        conn.close()
+    os.replace(part, path)
+    return counts
+
+
+def split(source, class_map, out_dir=SHARD_DIR, default=None, registry=TENANTS_FILE, log=print):
+    """Copy every school's classes out of `source` into <out_dir>/<slug>.db; returns {slug: path}."""
+    src = connect(source)
+    try:
+        migrate(src)
+        classes = [row[0] for row in src.execute(
+            "SELECT COALESCE(class_section, '') FROM students UNION SELECT class_section FROM class_daily")]
+        if src.execute("SELECT COUNT(*) FROM archives WHERE archived_at IS NULL").fetchone()[0]:
+            raise ValueError("An academic year is half archived; finish it with `archive.py archive` first.")
+        years = archived_years(src)
+        total = src.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    finally:
+        src.close()
+
+    assignment = {cls: class_map.get(cls, default) for cls in classes}
+    unmapped = sorted(cls for cls, slug in assignment.items() if slug is None)
+    if unmapped:
+        shown = ", ".join(repr(cls) for cls in unmapped[:10]) + (", ..." if len(unmapped) > 10 else "")
+        raise ValueError(f"No tenant for {len(unmapped)} classes ({shown}); add them to the map or pass --default.")
+    paths = {slug: os.path.join(out_dir, f"{slug}.db") for slug in sorted(set(assignment.values()))}
+    existing = [path for path in paths.values() if os.path.exists(path)]
+    if existing:
+        raise FileExistsError(f"Shards already exist: {', '.join(existing)}.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    copied = 0
+    for slug, path in paths.items():
+        counts = _make_shard(source, years, slug, [cls for cls, s in assignment.items() if s == slug], path)
+        register(slug, path, path=registry)
+        copied += counts["students"]
+        log(f"{slug}: {counts['students']:,} students, {counts['attendance']:,} attendance, "
+            f"{counts['student_remarks']:,} remarks, {counts['activities']:,} notes (hot) -> {path}")
+    log(f"{copied:,} of {total:,} students copied into {len(paths)} shards; {source} is unchanged.")
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the schools served by this app, one database each.")
+    parser.add_argument("command", choices=["list", "add", "split"])
+    parser.add_argument("slug", nargs="?", help="school to add, e.g. north")
+    parser.add_argument("--registry", default=TENANTS_FILE)
+    parser.add_argument("--name", help="display name (add)")
+    parser.add_argument("--access-code", help="code asked for once per session (add)")
+    parser.add_argument("--db", help=f"database: the school's (add; default {SHARD_DIR}/<slug>.db) "
+                                     f"or the combined one (split; default {DB_PATH})")
+    parser.add_argument("--map", help="CSV with class_section,tenant columns (split)")
+    parser.add_argument("--out", default=SHARD_DIR, help="folder for the shards (split)")
+    parser.add_argument("--default", help="tenant for classes missing from --map (split)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "add":
+            if not args.slug:
+                parser.error("add needs a slug")
+            tenant = register(args.slug, args.db or os.path.join(SHARD_DIR, f"{args.slug}.db"),
+                              args.name, args.access_code, args.registry)
+            print(f"{tenant.slug}: {tenant.name} -> {tenant.db}")
+            return 0
+        if args.command == "split":
+            if not args.map:
+                parser.error("split needs --map")
+            split(args.db or DB_PATH, read_class_map(args.map), args.out, args.default, args.registry)
+            return 0
+    except (ValueError, FileExistsError) as e:
+        print(e)
+        return 1
+
+    tenants = load_tenants(args.registry)
+    if not tenants:
+        print(f"No registry at {args.registry}; the app serves {DB_PATH}.")
+    for tenant in tenants.values():
+        size = f"{os.path.getsize(tenant.db) / 1024:,.0f} KiB" if os.path.exists(tenant.db) else "not created yet"
+        print(f"{tenant.slug:>14}: {tenant.name}, {tenant.db}, {size}{', access code' if tenant.access_code else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+import pytest
+
+import cache
+from bench.fixtures import generate
+from db import get_pool
+
+
+@pytest.fixture(scope="session")
+def school_db(tmp_path_factory):
+    """A small generated school: 2 classes, 20 students, one year of attendance."""
+    path = str(tmp_path_factory.mktemp("school") / "students.db")
+    generate(path, classes=2, students=20, years=1, progress=lambda *args: None)
+    return path
+
+
+@pytest.fixture
+def conn(school_db):
+    # Every test starts cold, so statement counts do not depend on test order
+    cache.clear_all()
+    with get_pool(school_db).connection() as conn:
+        yield conn
@@ -0,0 +1,69 @@
+"""SummaryJobs against FakeClient: no Ollama server needed."""
+import pytest
+
+from ai_jobs import FakeClient, JobQueueFull, SummaryJobs
+
+
+PROMPT = "Class 5A\nAsha: 92%\nRavi: 71%"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "students.db")
+
+
+def test_identical_requests_share_one_job(db_path):
+    client = FakeClient(reply="Ravi needs attention", delay=0.05)
+    jobs = SummaryJobs(client=client, path=db_path)
+
+    first = jobs.submit("mistral", PROMPT)
+    second = jobs.submit("mistral", PROMPT)
+    assert second is first
+    assert first.wait(5)
+    assert first.error is None
+    assert first.text.strip() == "Ravi needs attention"
+    assert client.calls == 1
+
+    # A different model or prompt is a different request
+    other = jobs.submit("llama3", PROMPT)
+    assert other is not first
+    assert other.wait(5)
+    assert client.calls == 2
+
+
+def test_finished_summary_is_served_from_the_database(db_path):
+    first = SummaryJobs(client=FakeClient(delay=0), path=db_path).submit("mistral", PROMPT)
+    assert first.wait(5)
+
+    # A new process (a fresh manager) finds the stored summary and never calls the model
+    client = FakeClient(delay=0)
+    job = SummaryJobs(client=client, path=db_path).submit("mistral", PROMPT)
+    assert job.done and job.cached
+    assert job.text == first.text
+    assert client.calls == 0
+
+
+def test_client_error_is_reported_and_retried(db_path):
+    client = FakeClient(error=ConnectionError("Ollama is not running"))
+    jobs = SummaryJobs(client=client, path=db_path)
+
+    failed = jobs.submit("mistral", PROMPT)
+    assert failed.wait(5)
+    assert isinstance(failed.error, ConnectionError)
+    assert failed.text == ""
+
+    # Nothing was cached, and asking again starts a new attempt
+    client.error = None
+    retry = jobs.submit("mistral", PROMPT)
+    assert retry is not failed
+    assert retry.wait(5)
+    assert retry.error is None and not retry.cached
+    assert client.calls == 2
+
+
+def test_queue_full(db_path):
+    jobs = SummaryJobs(client=FakeClient(delay=0.05), path=db_path, max_workers=1, max_pending=1)
+    running = jobs.submit("mistral", PROMPT)
+    with pytest.raises(JobQueueFull):
+        jobs.submit("mistral", PROMPT + "\nMeera: 88%")
+    assert running.wait(5)
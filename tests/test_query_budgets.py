@@ -0,0 +1,62 @@
+"""Statement budgets for the page data paths, measured with profiler.profile()."""
+from datetime import date, timedelta
+
+import pytest
+
+from attendance import date_columns
+from attendance_stats import attendance_summary
+from profiler import StatementBudgetExceeded, profile
+from remarks import changed_remarks, load_remarks_grid, save_remarks
+
+
+# Inside the fixture's year of attendance (up to today), starting and
+# ending mid-month so both ends are partial months with whole ones between
+_LAST_MONTH = date.today().replace(day=1) - timedelta(days=1)
+RANGE_END = str(_LAST_MONTH.replace(day=14))
+RANGE_START = str((_LAST_MONTH - timedelta(days=90)).replace(day=15))
+
+
+@pytest.mark.parametrize("class_section, start_date, end_date, budget", [
+    ("1A", None, None, 1),
+    (None, None, None, 1),
+    # Each partial month at either end of a range also looks up the archived years
+    ("1A", RANGE_START, RANGE_END, 3),
+])
+def test_overview_budget(conn, class_section, start_date, end_date, budget):
+    with profile("overview") as p:
+        df = attendance_summary(conn, class_section, start_date, end_date)
+    assert not df.empty
+    p.assert_max_statements(budget)
+
+    # A rerun with nothing changed is served from the cache
+    with profile("overview") as p:
+        attendance_summary(conn, class_section, start_date, end_date)
+    p.assert_max_statements(0)
+
+
+def test_remarks_budget(conn):
+    dates = date_columns(RANGE_START, RANGE_END)[:5]
+    with profile("remarks") as p:
+        grid = load_remarks_grid(conn, "1A", dates)
+    p.assert_max_statements(2)
+
+    edited = grid.copy()
+    edited.loc[0, dates[0]] = "Budget test remark"
+    edited.loc[1, dates[1]] = ""
+    upserts, deletes = changed_remarks(grid, edited, dates)
+    with profile("remarks save") as p:
+        save_remarks(conn, upserts, deletes)
+    # One executemany per kind of change, however many cells changed
+    p.assert_max_statements(2)
+
+    with profile("remarks") as p:
+        reloaded = load_remarks_grid(conn, "1A", dates)
+    p.assert_max_statements(2)
+    assert reloaded.loc[0, dates[0]] == "Budget test remark"
+
+
+def test_budget_exceeded_lists_statements(conn):
+    with profile("overview") as p:
+        attendance_summary(conn, "1B", RANGE_START, RANGE_END)
+    with pytest.raises(StatementBudgetExceeded, match="overview issued 3 statements, budget is 1"):
+        p.assert_max_statements(1)
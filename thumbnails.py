@@ -0,0 +1,64 @@
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, UnidentifiedImageError
+
+
+# ---------- PHOTO THUMBNAILS ----------
+# Student cards show photos at 80px, so decoding and sending the original
+# file on every rerun is wasted work. The first request for a photo writes
+# a small JPEG into THUMB_DIR, named after the source path, its mtime and
+# the size; later reruns (and other sessions) reuse that file. Editing the
+# photo changes its mtime and so produces a fresh thumbnail.
+
+THUMB_DIR = os.environ.get("TRACKMYCLASS_THUMB_DIR", ".thumbnails")
+THUMB_SIZE = 160  # px, twice the displayed width for high-DPI screens
+
+
+def _cache_path(path, mtime_ns, size):
+    digest = hashlib.sha1(f"{os.path.abspath(path)}|{mtime_ns}|{size}".encode("utf-8")).hexdigest()
+    return os.path.join(THUMB_DIR, digest[:2], f"{digest}.jpg")
+
+
+def thumbnail(photo, size=THUMB_SIZE):
+    """Return something st.image can show for `photo`, or None if there is no usable image.
+
+    URLs are passed through untouched; the browser fetches them itself.
+    """
+    photo = (photo or "").strip()
+    if not photo:
+        return None
+    if photo.startswith(("http://", "https://")):
+        return photo
+
+    try:
+        mtime_ns = os.stat(photo).st_mtime_ns
+    except OSError:
+        return None
+
+    target = _cache_path(photo, mtime_ns, size)
+    if os.path.exists(target):
+        return target
+
+    tmp = None
+    try:
+        with Image.open(photo) as img:
+            img.thumbnail((size, size))
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Write then rename so a concurrent reader never sees half a file;
+            # every writer (thread or process) gets its own temp file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, "JPEG", quality=85)
+            os.replace(tmp, target)
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError, ValueError):
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return None
+    return target
@@ -0,0 +1,30 @@
+import importlib
+
+
+# ---------- PAGE REGISTRY ----------
+# Menu label -> module with a render(conn) function. A page module (and
+# whatever it imports, e.g. PIL or the AI client) is only imported
+# the first time that page is opened in the process.
+
+PAGES = {
+    "Students by Class-Section": "views.students_by_class",
+    "Manage Students": "views.manage_students",
+    "Upload Students List": "views.upload_students",
+    "Mark Attendance": "views.mark_attendance",
+    "Class Attendance Overview": "views.class_overview",
+    "Early Warnings": "views.early_warnings",
+    "Daily Notes": "views.daily_notes",
+    "Reports": "views.reports",
+    "Students Remarks": "views.student_remarks",
+    "Search": "views.search_records",
+    "AI Insights": "views.ai_insights",
+}
+
+# Admin-only pages across every school (see tenants.py)
+ADMIN_PAGES = {
+    "District Overview": "views.district",
+}
+
+
+def render(label, conn):
+    importlib.import_module({**PAGES, **ADMIN_PAGES}[label]).render(conn)
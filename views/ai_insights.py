@@ -0,0 +1,57 @@
+from datetime import date
+
+import streamlit as st
+
+from ai_jobs import AI_MODEL, JobQueueFull, get_jobs
+from ai_prompt import build_class_context, build_prompt
+from students import class_list
+
+
+# ---------- AI INSIGHTS ----------
+def render(conn):
+    st.subheader("🤖 AI Insights - Class Summary (Mistral)")
+
+    classes_list = class_list(conn)
+
+    if not classes_list:
+        st.warning("No students found. Please add students first.")
+    else:
+        # Select Class
+        selected_class = st.selectbox("Select Class/Section", classes_list)
+
+        start_date = st.date_input("Start Date", date.today())
+        end_date = st.date_input("End Date", date.today())
+
+        if st.button("🔍 Generate AI Summary"):
+            # --- Per-student aggregates, cut to the prompt's token budget ---
+            summary_text, prompt_stats = build_class_context(conn, selected_class, start_date, end_date)
+            prompt = build_prompt(summary_text)
+            st.caption(
+                f"Prompt: ~{prompt_stats['tokens']} tokens from {prompt_stats['raw_rows']} records "
+                f"(~{prompt_stats['raw_tokens']} tokens as raw rows)"
+                + (" — trimmed to fit the token budget" if prompt_stats['truncated'] else "")
+            )
+
+            # --- AI Summary runs in the background; identical data is served from cache ---
+            try:
+                job = get_jobs(conn.path).submit(AI_MODEL, prompt)
+                st.session_state['ai_job'] = (selected_class, start_date, end_date, job.key, summary_text)
+            except JobQueueFull as e:
+                st.error(str(e))
+
+        # Show the summary for the current selection, streaming while it is generated
+        current = st.session_state.get('ai_job')
+        job = get_jobs(conn.path).get(current[3]) if current and current[:3] == (selected_class, start_date, end_date) else None
+        if job is not None:
+            st.markdown("### 🤖 AI Generated Summary")
+            placeholder = st.empty()
+            while not job.wait(0.2):
+                placeholder.info(job.text + " ▌")
+
+            if job.error:
+                placeholder.error(f"AI summary could not be generated: {job.error}")
+                st.text_area("Raw data for manual review", current[4], height=300)
+            else:
+                placeholder.info(job.text)
+                if job.cached:
+                    st.caption("Served from the summary cache — the class data has not changed.")
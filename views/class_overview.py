@@ -0,0 +1,55 @@
+from datetime import date
+
+import streamlit as st
+
+from attendance_stats import attendance_summary, below_threshold, LOW_ATTENDANCE_THRESHOLD
+from charts import heatmap_chart, summary_chart, trend_chart
+from students import class_list
+
+
+# ---------- CLASS ATTENDANCE OVERVIEW ----------
+def render(conn):
+    st.subheader("🏫 Class & Section Attendance Overview")
+
+    classes = class_list(conn)
+    if not classes:
+        st.warning("No classes found. Please add students first.")
+    else:
+        selected_class = st.selectbox("Select Class/Section", ["All"] + classes)
+
+        start_date = end_date = None
+        if st.checkbox("Limit to a date range"):
+            start_date = st.date_input("Start Date", date.today().replace(day=1))
+            end_date = st.date_input("End Date", date.today())
+
+        class_filter = None if selected_class == "All" else selected_class
+        df = attendance_summary(
+            conn,
+            class_section=class_filter,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+        if df.empty:
+            st.info("No students in this class.")
+        else:
+            st.dataframe(df.drop(columns=["student_id"]))
+
+            low_attendance = below_threshold(df)
+            if not low_attendance.empty:
+                st.warning(f"⚠️ Students below {LOW_ATTENDANCE_THRESHOLD}% attendance:")
+                st.dataframe(low_attendance.drop(columns=["student_id"]))
+
+            # Drawn in the browser; only the chosen chart's spec is built (and cached)
+            view = st.radio("Chart", ["Attendance %", "Daily trend", "Heatmap"], horizontal=True)
+            if view == "Attendance %":
+                st.vega_lite_chart(summary_chart(conn, class_filter, start_date, end_date), use_container_width=True)
+            else:
+                chart = trend_chart if view == "Daily trend" else heatmap_chart
+                spec, period = chart(conn, class_filter, start_date, end_date)
+                if spec is None:
+                    st.info("No attendance marked in this period.")
+                else:
+                    if period != "day":
+                        st.caption(f"Long range — showing attendance per {period}.")
+                    st.vega_lite_chart(spec, use_container_width=True)
@@ -0,0 +1,23 @@
+from datetime import date
+
+import streamlit as st
+
+from notes import add_note
+from students import count_students
+from views.widgets import student_picker
+
+
+# ---------- DAILY NOTES ----------
+def render(conn):
+    st.subheader("📝 Add Daily Notes")
+    today = str(date.today())
+
+    if count_students(conn) == 0:
+        st.warning("No students found. Please add students first.")
+    else:
+        sid, student = student_picker(conn, "notes")
+        if sid is not None:
+            note = st.text_area("Enter activity/note")
+            if st.button("💾 Save Note"):
+                add_note(conn, sid, today, note)
+                st.success(f"✅ Note saved for {student}")
@@ -0,0 +1,43 @@
+from datetime import date
+
+import streamlit as st
+
+from archive import academic_year, year_range
+from district import TOTAL, district_classes, district_summary
+
+
+# ---------- DISTRICT OVERVIEW ----------
+# Every school's database is queried at once (district.py); `conn`, the
+# school picked for this session, is not used.
+def render(conn):
+    st.subheader("🏛️ District Overview")
+
+    year_start = date.fromisoformat(year_range(academic_year(date.today()))[0])
+    col_from, col_to = st.columns(2)
+    start_date = col_from.date_input("From", year_start, key="district_from")
+    end_date = col_to.date_input("To", date.today(), key="district_to")
+
+    schools, errors = district_summary(str(start_date), str(end_date))
+    for school, error in errors.items():
+        st.warning(f"⚠️ {school} could not be read and is left out: {error}")
+    if schools.empty:
+        st.info("No school data to show.")
+        return
+
+    total = schools.loc[TOTAL]
+    names = schools["School"].drop(TOTAL).tolist()
+    cols = st.columns(4)
+    cols[0].metric("Schools", len(names))
+    cols[1].metric("Students", f"{int(total['Students']):,}")
+    cols[2].metric("Attendance %", f"{total['Attendance %']:.2f}")
+    cols[3].metric("Below Threshold", f"{int(total['Below Threshold']):,}")
+    st.dataframe(schools.reset_index(drop=True), hide_index=True)
+    st.caption("Flagged Now counts the students with early warnings today, whatever the dates above.")
+
+    st.write("### Classes")
+    classes, _ = district_classes(str(start_date), str(end_date))
+    school = st.selectbox("School", ["All"] + names, key="district_school")
+    if school != "All":
+        classes = classes[classes["School"] == school]
+    st.dataframe(classes, hide_index=True)
+    st.download_button("⬇️ Download CSV", classes.to_csv(index=False), "district_classes.csv", "text/csv")
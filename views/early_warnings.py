@@ -0,0 +1,36 @@
+import streamlit as st
+
+from early_warning import RULES, last_run, load_warnings, run
+from students import class_list
+
+
+# ---------- EARLY WARNINGS ----------
+def render(conn):
+    st.subheader("🚨 Early Warnings")
+
+    finished = last_run(conn)
+    st.caption(f"Last analysed: {finished or 'never'} — only classes with new data are re-analysed.")
+    if st.button("🔄 Update warnings"):
+        bar = st.progress(0.0, text="Analysing classes...")
+        result = run(conn.path, progress=lambda done, total: bar.progress(done / total, text=f"Analysed {done}/{total} classes"))
+        bar.empty()
+        st.success(f"✅ Analysed {result['classes']} classes ({result['skipped']} unchanged), "
+                   f"{result['flags']} warnings.")
+
+    classes = class_list(conn)
+    selected_class = st.selectbox("Select Class/Section", ["All"] + classes)
+    warnings = load_warnings(conn, None if selected_class == "All" else selected_class)
+
+    if warnings.empty:
+        st.info("No students flagged." if finished else "No analysis yet — press Update warnings.")
+        return
+
+    cols = st.columns(len(RULES))
+    for col, (rule, label) in zip(cols, RULES.items()):
+        col.metric(label, int((warnings["rule"] == rule).sum()))
+
+    chosen = st.multiselect("Warnings", list(RULES.values()), default=list(RULES.values()))
+    shown = warnings[warnings["Warning"].isin(chosen)]
+    st.write(f"### {shown['student_id'].nunique()} students flagged")
+    st.dataframe(shown.drop(columns=["student_id", "rule", "value", "computed_at"]), hide_index=True,
+                 use_container_width=True)
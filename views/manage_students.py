@@ -0,0 +1,132 @@
+import sqlite3
+
+import streamlit as st
+
+from students import (add_student, changed_students, class_list, count_roster, delete_students, move_students,
+                      roster_slice, update_students)
+
+
+# ---------- MANAGE STUDENTS ----------
+def render(conn):
+    st.subheader("👩‍🎓 Manage Students")
+
+    # Add Student
+    with st.form("add_form", clear_on_submit=True):
+        name = st.text_input("Student Name")
+        roll_no = st.text_input("Roll No")
+        class_section = st.text_input("Class/Section")
+        father_name = st.text_input("Father's Name")
+        contact = st.text_input("Contact")
+        photo = st.text_input("Photo Path (optional)")
+        submitted = st.form_submit_button("➕ Add Student")
+        if submitted and name and roll_no and class_section:
+            try:
+                add_student(conn, name, roll_no, class_section, father_name, contact, photo)
+                st.success(f"✅ {name} added successfully!")
+            except sqlite3.IntegrityError:
+                st.error(f"Roll No {roll_no} already exists in Class/Section {class_section}.")
+
+    classes = class_list(conn)
+    if not classes:
+        st.info("No students added yet. Use the form above to add.")
+        return
+
+    st.write("### 📋 Students List")
+
+    # Filters run in SQL; only the visible page comes back
+    col_class, col_name, col_roll, col_size = st.columns([2, 3, 2, 1])
+    selected_class = col_class.selectbox("Class/Section", ["All"] + classes, key="manage_class")
+    name_filter = col_name.text_input("Name", key="manage_name").strip() or None
+    roll_filter = col_roll.text_input("Roll No", key="manage_roll").strip() or None
+    page_size = col_size.selectbox("Per page", [25, 50, 100], key="manage_size")
+    filters = (None if selected_class == "All" else selected_class, name_filter, roll_filter)
+
+    # Keyset pagination: a stack of "after id" cursors, one per page visited
+    if st.session_state.get("manage_filters") != (filters, page_size):
+        st.session_state["manage_filters"] = (filters, page_size)
+        st.session_state["manage_cursors"] = [0]
+    cursors = st.session_state["manage_cursors"]
+
+    total = count_roster(conn, *filters)
+    rows = roster_slice(conn, cursors[-1], page_size, *filters)
+    page, has_next = rows.head(page_size), len(rows) > page_size
+    if page.empty and len(cursors) > 1:
+        # Everything after the cursor was deleted or moved away
+        cursors.pop()
+        st.rerun()
+
+    if "roster_done" in st.session_state:
+        st.success(st.session_state.pop("roster_done"))
+    _show_refused()
+    if page.empty:
+        st.info("No students match these filters.")
+        return
+
+    first = (len(cursors) - 1) * page_size + 1
+    st.caption(f"Showing {first}–{first + len(page) - 1} of {total} students")
+
+    with st.form("roster_form"):
+        edited = st.data_editor(
+            page.assign(selected=False),
+            key=f"roster_{cursors[-1]}_{filters}_{st.session_state.get('roster_saves', 0)}",
+            hide_index=True,
+            disabled=["id"],
+            column_order=["selected"] + [c for c in page.columns if c != "id"],
+            column_config={
+                "selected": st.column_config.CheckboxColumn("✔", help="Select for bulk move/delete"),
+                "name": "Name", "roll_no": "Roll No", "class_section": "Class/Section",
+                "father_name": "Father's Name", "contact": "Contact", "photo": "Photo Path",
+            },
+        )
+        col_save, col_move, col_target, col_delete = st.columns([2, 2, 2, 2])
+        save = col_save.form_submit_button("💾 Save Changes")
+        target = col_target.text_input("Move to Class/Section", label_visibility="collapsed",
+                                       placeholder="Move to Class/Section")
+        move = col_move.form_submit_button("➡️ Move Selected")
+        confirm = col_delete.checkbox("Confirm delete")
+        delete = col_delete.form_submit_button("🗑️ Delete Selected")
+
+    selected = edited.loc[edited["selected"], "id"].tolist()
+    done = None
+    try:
+        if save:
+            rows, refused = changed_students(page, edited.drop(columns=["selected"]))
+            if refused:
+                st.session_state["roster_refused"] = refused
+            if rows:
+                done = f"✅ {update_students(conn, rows)} students updated."
+            else:
+                # Nothing saved: keep the edits in the editor so they can be fixed
+                _show_refused()
+        elif move:
+            if not selected or not target.strip():
+                st.warning("Select students and enter the Class/Section to move them to.")
+            else:
+                done = f"✅ {move_students(conn, selected, target)} students moved to {target.strip()}."
+        elif delete:
+            if not selected or not confirm:
+                st.warning("Select students and tick Confirm delete first.")
+            else:
+                done = f"❌ {delete_students(conn, selected)} students deleted."
+    except sqlite3.IntegrityError:
+        st.error("Another student in that Class/Section already has one of these roll numbers; nothing was changed.")
+    if done:
+        # Redraw from the saved data, with a fresh editor
+        st.session_state["roster_saves"] = st.session_state.get("roster_saves", 0) + 1
+        st.session_state["roster_done"] = done
+        st.rerun()
+
+    col_prev, col_next = st.columns(2)
+    if col_prev.button("⬅️ Previous", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if col_next.button("Next ➡️", disabled=not has_next):
+        cursors.append(int(page["id"].iloc[-1]))
+        st.rerun()
+
+
+def _show_refused():
+    refused = st.session_state.pop("roster_refused", None)
+    if refused:
+        st.error(f"⚠️ {len(refused)} rows not saved; Name, Roll No and Class/Section are required:\n\n"
+                 + "\n".join(f"- {row}" for row in refused))
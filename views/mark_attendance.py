@@ -0,0 +1,57 @@
+from datetime import date
+
+import streamlit as st
+
+from archive import archived_until
+from attendance import changed_cells, date_columns, load_attendance_grid, save_attendance
+from students import class_list
+
+
+# ---------- MARK ATTENDANCE ----------
+def render(conn):
+    st.subheader("📋 Mark Attendance")
+
+    classes = class_list(conn)
+
+    if not classes:
+        st.warning("No students found. Please add students first.")
+    else:
+        selected_class = st.selectbox("Select Class/Section", options=classes)
+
+        # A range lets a teacher back-fill several days in one save
+        picked = st.date_input("Date(s)", value=(date.today(), date.today()), max_value=date.today())
+        start_date, end_date = (picked[0], picked[-1]) if picked else (date.today(), date.today())
+        dates = date_columns(start_date, end_date)
+
+        if len(dates) > 31:
+            st.error("Please pick at most 31 days at a time.")
+        else:
+            grid, recorded = load_attendance_grid(conn, selected_class, dates)
+
+            closed = archived_until(conn)
+            if grid.empty:
+                st.info(f"No students in Class/Section: {selected_class}.")
+            elif closed is not None and dates[0] <= closed:
+                st.info(f"🗄️ Attendance up to {closed} is archived and read-only.")
+                st.dataframe(grid.drop(columns=["student_id"]), hide_index=True)
+            else:
+                st.caption("Everyone is marked present by default — untick the students who were absent.")
+                with st.form("attendance_form"):
+                    edited = st.data_editor(
+                        grid,
+                        key=f"att_{selected_class}_{dates[0]}_{dates[-1]}_{st.session_state.get('att_saves', 0)}",
+                        hide_index=True,
+                        disabled=["student_id", "Name", "Roll No"],
+                        column_config={
+                            "student_id": None,
+                            **{d: st.column_config.CheckboxColumn(d) for d in dates},
+                        },
+                    )
+
+                    save_att = st.form_submit_button("💾 Save Attendance")
+                    if save_att:
+                        saved = save_attendance(conn, changed_cells(grid, edited, recorded, dates))
+                        # New editor key so the next render starts from the saved data
+                        st.session_state['att_saves'] = st.session_state.get('att_saves', 0) + 1
+                        span = dates[0] if len(dates) == 1 else f"{dates[0]} to {dates[-1]}"
+                        st.success(f"✅ Attendance saved for Class {selected_class} on {span} ({saved} changes)!")
@@ -0,0 +1,32 @@
+from datetime import date
+
+import streamlit as st
+
+from archive import academic_year, year_range
+from attendance import student_attendance
+from notes import student_notes
+from students import count_students
+from views.widgets import student_picker
+
+
+# ---------- REPORTS ----------
+def render(conn):
+    st.subheader("📊 Reports")
+
+    if count_students(conn) == 0:
+        st.warning("No students found. Please add students first.")
+    else:
+        sid, student = student_picker(conn, "reports")
+        if sid is not None:
+            # The current academic year by default; earlier years open their archive files
+            year_start = date.fromisoformat(year_range(academic_year(date.today()))[0])
+            start_date = st.date_input("From", year_start, key="reports_from")
+            end_date = st.date_input("To", date.today(), key="reports_to")
+
+            st.write("### Attendance Record")
+            attendance = student_attendance(conn, sid, start_date, end_date)
+            st.dataframe(attendance)
+
+            st.write("### Daily Notes")
+            notes = student_notes(conn, sid, start_date, end_date)
+            st.dataframe(notes)
@@ -0,0 +1,38 @@
+import streamlit as st
+
+from search import count_note_matches, count_student_matches, search_notes, search_students
+
+
+# ---------- SEARCH ----------
+def render(conn):
+    st.subheader("🔎 Search")
+
+    scope = st.radio("Search in", ["Students", "Notes & remarks"], horizontal=True)
+    hint = "name, roll no or father's name" if scope == "Students" else "words from a note or remark"
+    text = st.text_input(f"Search ({hint})")
+    if not text.strip():
+        st.info("Type a few letters to search.")
+        return
+
+    total = count_student_matches(conn, text) if scope == "Students" else count_note_matches(conn, text)
+    if total == 0:
+        st.info("No matches.")
+        return
+
+    col_size, col_page = st.columns(2)
+    page_size = col_size.selectbox("Results per page", [10, 25, 50], index=1)
+    pages = -(-total // page_size)
+    page = int(col_page.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1))
+
+    first = (page - 1) * page_size + 1
+    if scope == "Students":
+        results = search_students(conn, text, page=page, page_size=page_size)
+        st.caption(f"Showing {first}–{first + len(results) - 1} of {total} students, best match first")
+        st.dataframe(results.drop(columns=["id"]), hide_index=True, use_container_width=True)
+    else:
+        results = search_notes(conn, text, page=page, page_size=page_size)
+        order = ("most relevant first" if results["ranked"].all()
+                 else "newest first (too many matches to rank, add words to narrow the search)")
+        st.caption(f"Showing {first}–{first + len(results) - 1} of {total} notes and remarks, {order}")
+        for row in results.itertuples():
+            st.markdown(f"**{row.name}** (Roll {row.roll_no}, {row.class_section}) · {row.kind} · {row.date}  \n{row.snippet}")
@@ -0,0 +1,55 @@
+from datetime import date
+
+import streamlit as st
+import pandas as pd
+
+from archive import archived_until
+from attendance import date_columns
+from remarks import changed_remarks, load_remarks_grid, save_remarks
+from students import class_list
+
+
+# ---------- STUDENTS REMARKS ----------
+def render(conn):
+    st.subheader("📝 Students Remarks (Class-wise)")
+
+    classes = class_list(conn)
+    if not classes:
+        st.warning("No students found. Please add students first.")
+    else:
+        # Select Class
+        selected_class = st.selectbox("Select Class/Section", ["All"] + classes)
+
+        # Choose number of days to show remarks for
+        num_days = st.number_input("Number of days to enter remarks", min_value=1, max_value=31, value=7)
+        start_date = st.date_input("Start Date", date.today())
+        dates = date_columns(start_date, start_date + pd.Timedelta(days=num_days - 1))
+
+        grid = load_remarks_grid(conn, None if selected_class == "All" else selected_class, dates)
+
+        closed = archived_until(conn)
+        if grid.empty:
+            st.info(f"No students in Class/Section: {selected_class}.")
+        elif closed is not None and dates[0] <= closed:
+            st.info(f"🗄️ Remarks up to {closed} are archived and read-only.")
+            st.dataframe(grid.drop(columns=["student_id"]), hide_index=True)
+        else:
+            st.write(f"### Students in Class/Section: {selected_class}")
+
+            with st.form("remarks_form"):
+                edited = st.data_editor(
+                    grid,
+                    key=f"remarks_{selected_class}_{dates[0]}_{dates[-1]}_{st.session_state.get('remark_saves', 0)}",
+                    hide_index=True,
+                    disabled=["student_id", "Name", "Roll No"],
+                    column_config={
+                        "student_id": None,
+                        **{d: st.column_config.TextColumn(d) for d in dates},
+                    },
+                )
+
+                if st.form_submit_button("💾 Save Remarks"):
+                    upserts, deletes = changed_remarks(grid, edited, dates)
+                    saved = save_remarks(conn, upserts, deletes)
+                    st.session_state['remark_saves'] = st.session_state.get('remark_saves', 0) + 1
+                    st.success(f"✅ Remarks updated successfully! ({saved} changes)")
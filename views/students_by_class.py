@@ -0,0 +1,53 @@
+import streamlit as st
+
+from students import class_list, count_students, roster_page
+from thumbnails import thumbnail
+
+
+# ---------- STUDENTS BY CLASS/SECTION ----------
+def render(conn):
+    st.subheader("👩‍🏫 Students by Class/Section")
+
+    classes_list = class_list(conn)
+
+    if not classes_list:
+        st.warning("No students found. Please add students first.")
+    else:
+        selected_class = st.selectbox("Select Class/Section", options=["All"] + classes_list)
+
+        class_filter = None if selected_class == "All" else selected_class
+        total = count_students(conn, class_filter)
+
+        if total == 0:
+            st.info(f"No students found in Class/Section: {selected_class}.")
+        else:
+            st.write(f"### Students in Class/Section: {selected_class}")
+
+            # Only the visible page is queried and rendered
+            col_size, col_page = st.columns(2)
+            page_size = col_size.selectbox("Students per page", [10, 25, 50, 100], index=1)
+            pages = -(-total // page_size)
+            page = col_page.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+            page_students = roster_page(conn, class_filter, int(page), page_size)
+
+            first = (page - 1) * page_size + 1
+            st.caption(f"Showing {first}–{first + len(page_students) - 1} of {total} students")
+            st.dataframe(
+                page_students[['name', 'roll_no', 'father_name', 'contact', 'photo', 'class_section']],
+                use_container_width=True
+            )
+
+            for _, row in page_students.iterrows():
+                col1, col2 = st.columns([1, 3])
+                with col1:
+                    if row['photo']:
+                        thumb = thumbnail(row['photo'])
+                        if thumb:
+                            st.image(thumb, width=80)
+                        else:
+                            st.text("No photo")
+                with col2:
+                    st.markdown(f"**{row['name']}** (Roll: {row['roll_no']})")
+                    st.text(f"Father: {row['father_name']}")
+                    st.text(f"Contact: {row['contact']}")
+            st.divider()
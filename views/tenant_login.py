@@ -0,0 +1,55 @@
+import streamlit as st
+
+
+# ---------- SCHOOL SELECTION ----------
+# With a tenant registry (tenants.py) every session works in one school's
+# database. The school comes from ?school=<slug> or the sidebar; one with
+# an access code asks for it once per session. Admins skip the codes.
+def choose_tenant(tenants, admin=False):
+    """The session's Tenant, or None while the user still has to pick one."""
+    wanted = st.query_params.get("school")
+    current = st.session_state.get("tenant")
+    if current in tenants and wanted in (None, current):
+        tenant = tenants[current]
+    else:
+        tenant = _login(tenants, wanted, admin)
+        if tenant is None:
+            return None
+
+    st.sidebar.markdown(f"🏫 **{tenant.name}**")
+    if len(tenants) > 1 and st.sidebar.button("🔁 Switch school"):
+        # Nothing chosen in one school's pages carries over to another's
+        st.session_state.clear()
+        st.query_params.pop("school", None)
+        st.rerun()
+    return tenant
+
+
+def _login(tenants, wanted, admin):
+    if wanted not in tenants and len(tenants) == 1:
+        wanted = next(iter(tenants))
+    if wanted in tenants and (admin or not tenants[wanted].access_code):
+        return _enter(tenants[wanted])
+
+    with st.sidebar.form("tenant_login"):
+        if wanted in tenants:
+            slug = wanted
+            st.markdown(f"🏫 **{tenants[slug].name}**")
+        else:
+            slug = st.selectbox("School", list(tenants), format_func=lambda s: tenants[s].name)
+        code = st.text_input("Access code", type="password", help="Leave empty if the school has none.")
+        if st.form_submit_button("🔓 Open"):
+            if admin or tenants[slug].allows(code):
+                _enter(tenants[slug])
+                st.rerun()
+            st.error("Wrong access code.")
+    st.info("Choose your school in the sidebar to continue.")
+    return None
+
+
+def _enter(tenant):
+    if st.session_state.get("tenant") not in (None, tenant.slug):
+        st.session_state.clear()
+    st.session_state["tenant"] = tenant.slug
+    st.query_params["school"] = tenant.slug
+    return tenant
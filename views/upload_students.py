@@ -0,0 +1,60 @@
+import streamlit as st
+
+from importer import import_students, missing_columns, read_preview, REQUIRED_COLUMNS
+
+
+# ---------- UPLOAD STUDENTS LIST ----------
+def render(conn):
+    st.subheader("📤 Upload Students (CSV or Excel)")
+
+    st.markdown("""
+    **Required columns:**  
+    - name  
+    - roll_no  
+    - class_section  
+    **Optional:** father_name, contact, photo  
+    """)
+
+    uploaded_file = st.file_uploader("Upload CSV or Excel file", type=["csv", "xlsx"])
+
+    if uploaded_file:
+        try:
+            preview = read_preview(uploaded_file, uploaded_file.name)
+
+            st.write("Preview of uploaded file:")
+            st.dataframe(preview)
+
+            missing = missing_columns(preview.columns)
+            if missing:
+                st.error(f"Missing required columns! Required: {', '.join(REQUIRED_COLUMNS)}")
+            else:
+                st.caption("Students are matched on Class/Section + Roll No; existing students are updated, not duplicated.")
+                dry_run = st.checkbox("Dry run (only show what would change)")
+
+                if st.button("🔍 Preview Changes" if dry_run else "💾 Save to Database"):
+                    status = st.empty()
+                    result = import_students(
+                        conn, uploaded_file, uploaded_file.name, dry_run=dry_run,
+                        progress=lambda n: status.text(f"Processed {n} rows..."),
+                    )
+                    status.empty()
+
+                    summary = (f"{result['read']} rows read: {result['inserted']} new, "
+                               f"{result['updated']} updated, {result['unchanged']} unchanged, "
+                               f"{len(result['rejected'])} rejected.")
+                    if dry_run:
+                        st.info(f"Dry run — nothing saved. {summary}")
+                        if not result["new"].empty:
+                            st.write("### ➕ New students")
+                            st.dataframe(result["new"])
+                        if not result["changed"].empty:
+                            st.write("### ✏️ Students that would be updated")
+                            st.dataframe(result["changed"])
+                    else:
+                        st.success(f"✅ Students uploaded successfully! {summary}")
+
+                    if not result["rejected"].empty:
+                        st.warning("⚠️ Rejected rows (row numbers as in the file):")
+                        st.dataframe(result["rejected"])
+        except Exception as e:
+            st.error(f"Error reading file: {e}")
@@ -0,0 +1,34 @@
+import streamlit as st
+
+from search import count_student_matches, search_students
+from students import count_students, roster_page
+
+
+# ---------- SHARED WIDGETS ----------
+
+PICKER_SIZE = 50
+
+
+def student_picker(conn, key):
+    """Search box plus a selectbox of the matching students.
+
+    Returns (student_id, label), or (None, None) when nothing matches.
+    Students are told apart by roll number and class, not just by name.
+    """
+    text = st.text_input("Search student (name, roll no or father's name)", key=f"{key}_search")
+    if text.strip():
+        matches = search_students(conn, text, page_size=PICKER_SIZE)
+        total = count_student_matches(conn, text)
+    else:
+        matches = roster_page(conn, None, 1, PICKER_SIZE)
+        total = count_students(conn)
+
+    if matches.empty:
+        st.info("No students match your search.")
+        return None, None
+
+    labels = {int(row.id): f"{row.name} (Roll {row.roll_no}, {row.class_section})" for row in matches.itertuples()}
+    sid = st.selectbox("Select Student", list(labels), format_func=labels.get, key=f"{key}_student")
+    if total > len(labels):
+        st.caption(f"Showing {len(labels)} of {total} students — type more to narrow the list.")
+    return sid, labels[sid]